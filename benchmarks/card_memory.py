@@ -0,0 +1,55 @@
+"""Memory used by the Card objects of a large deck.
+
+Run from the repository root:
+
+    python benchmarks/card_memory.py [cards]
+
+The card strings are created before tracing starts, so the numbers cover
+the Card objects and the deck's list only. A Card without __slots__ is
+measured alongside for comparison.
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.deck import Deck
+
+
+class DictCard:
+    """Card as it was before __slots__: every instance has a __dict__."""
+    def __init__(self, front, back, id=None):
+        self.front = front
+        self.back = back
+        self.id = id
+
+
+def measure(build):
+    tracemalloc.start()
+    deck = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return deck, current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    data = {
+        "name": "bench",
+        "cards": [{"id": f"{i:016x}", "front": f"front {i}", "back": f"back {i}"} for i in range(count)],
+    }
+    rows = [(c["front"], c["back"], c["id"]) for c in data["cards"]]
+
+    deck, slots = measure(lambda: Deck.from_dict(data))
+    del deck
+    cards, dicts = measure(lambda: [DictCard(*row) for row in rows])
+    del cards
+
+    print(f"{count} cards, strings excluded")
+    print(f"  Card with __dict__:   {dicts / 1e6:6.1f} MB, {dicts / count:5.0f} B/card")
+    print(f"  Card with __slots__:  {slots / 1e6:6.1f} MB, {slots / count:5.0f} B/card")
+
+
+if __name__ == "__main__":
+    main()
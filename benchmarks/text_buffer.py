@@ -0,0 +1,87 @@
+"""Editing speed of the vim editor's TextBuffer on large cards.
+
+Run from the repository root:
+
+    python benchmarks/text_buffer.py
+
+Each operation is timed on TextBuffer (with undo history, as the editor
+uses it) and on a plain list of lines edited with string slicing, the
+way the editor stored text before.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui.text_buffer import TextBuffer, UndoHistory
+
+KEYS = 2000
+
+
+def timed(run):
+    start = time.perf_counter()
+    run()
+    return (time.perf_counter() - start) * 1000
+
+
+def type_and_backspace_list(lines, y, x):
+    for i in range(KEYS):
+        line = lines[y]
+        lines[y] = line[:x + i] + "a" + line[x + i:]
+    for i in range(KEYS, 0, -1):
+        line = lines[y]
+        lines[y] = line[:x + i - 1] + line[x + i:]
+
+
+def type_and_backspace_buffer(buffer, y, x):
+    for i in range(KEYS):
+        buffer.insert(y, x + i, "a")
+    for i in range(KEYS, 0, -1):
+        buffer.delete(y, x + i - 1, 1)
+
+
+def paste_list(lines, y, pasted):
+    lines[y + 1:y + 1] = pasted
+
+
+def delete_lines_list(lines, y, count):
+    for _ in range(count):
+        del lines[y]
+
+
+def delete_lines_buffer(buffer, y, count):
+    for _ in range(count):
+        buffer.delete_lines(y)
+
+
+def report(name, old, new):
+    print(f"  {name:<44} {old:8.1f} ms {new:8.1f} ms")
+
+
+def main():
+    print(f"  {'operation':<44} {'list':>11} {'TextBuffer':>11}")
+    for length in (10_000, 100_000, 1_000_000):
+        text = "x" * length
+        old = timed(lambda: type_and_backspace_list([text], 0, length // 2))
+        buffer = TextBuffer(text, UndoHistory())
+        new = timed(lambda: type_and_backspace_buffer(buffer, 0, length // 2))
+        report(f"type+backspace {KEYS} chars mid {length}-char line", old, new)
+
+    card = [f"line {i}" for i in range(100_000)]
+    pasted = [f"pasted {i}" for i in range(100_000)]
+    lines = list(card)
+    old = timed(lambda: paste_list(lines, 50_000, pasted))
+    buffer = TextBuffer("\n".join(card), UndoHistory())
+    new = timed(lambda: buffer.insert_lines(50_001, pasted))
+    report("paste 100k lines into a 100k-line card", old, new)
+
+    lines = list(card)
+    old = timed(lambda: delete_lines_list(lines, 50_000, 1000))
+    buffer = TextBuffer("\n".join(card), UndoHistory())
+    new = timed(lambda: delete_lines_buffer(buffer, 50_000, 1000))
+    report("1000x dd in a 100k-line card", old, new)
+
+
+if __name__ == "__main__":
+    main()
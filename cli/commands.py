@@ -0,0 +1,207 @@
+import argparse
+import csv
+import sqlite3
+import sys
+import time
+from models.card import Card
+from models.importer import IMPORT_FORMATS
+from models.json_stream import write_deck_json
+from models.scheduler import DAY
+from models.storage import StorageError
+
+EXPORT_FORMATS = ("json", "csv", "tsv")
+DECK_FORMATS = ("json", "binary")
+
+
+def _positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def add_subcommands(subparsers):
+    """Registers the headless subcommands on the main argument parser."""
+    subparsers.add_parser('list', help='List decks and their card counts')
+
+    add_parser = subparsers.add_parser('add', help='Add one card to a deck (created if missing)')
+    add_parser.add_argument('deck')
+    add_parser.add_argument('front')
+    add_parser.add_argument('back')
+
+    import_parser = subparsers.add_parser('import', help='Bulk-import cards from a CSV/TSV/Anki text file')
+    import_parser.add_argument('deck', help='Deck to import into (created if missing)')
+    import_parser.add_argument('file', help='File to import')
+    import_parser.add_argument('--format', choices=IMPORT_FORMATS, help='File format (default: from the extension)')
+
+    export_parser = subparsers.add_parser('export', help='Write a deck as JSON, CSV or TSV')
+    export_parser.add_argument('deck')
+    export_parser.add_argument('file', nargs='?', help='Output file (default: stdout)')
+    export_parser.add_argument('--format', choices=EXPORT_FORMATS, default='json')
+
+    stats_parser = subparsers.add_parser('stats', help='Show card counts, file sizes and review history')
+    stats_parser.add_argument('deck', nargs='?', help='Deck to describe (default: all decks)')
+    stats_parser.add_argument('--days', type=_positive_int, help='Only count reviews from the last N days')
+
+    search_parser = subparsers.add_parser('search', help='Find cards containing words in any deck')
+    search_parser.add_argument('query', help='Words every card must contain (prefixes match)')
+    search_parser.add_argument('--deck', help='Only search this deck')
+    search_parser.add_argument('--limit', type=int, default=20, help='Most cards to print (default: 20)')
+
+    compact_parser = subparsers.add_parser('compact', help='Fold journals into deck files / reclaim database space')
+    compact_parser.add_argument('deck', nargs='?', help='Deck to compact (default: all decks)')
+
+    convert_parser = subparsers.add_parser('convert', help='Rewrite a deck file as JSON or memory-mapped binary')
+    convert_parser.add_argument('deck')
+    convert_parser.add_argument('--format', choices=DECK_FORMATS, required=True)
+
+    subparsers.add_parser('migrate', help='Import the JSON deck files into the SQLite database')
+
+
+def _error(message):
+    print(f"flash: {message}", file=sys.stderr)
+    return 1
+
+
+def _open_deck(deck_manager, name, create=False):
+    """Returns the deck called `name`, creating it first if asked to."""
+    deck = deck_manager.get_deck(name)
+    if deck is None and create:
+        if deck_manager.create_deck(name):
+            name = deck_manager._sanitize_filename(name)
+        deck = deck_manager.get_deck(name)
+    return deck
+
+
+def cmd_list(deck_manager, args):
+    for name in sorted(deck_manager.get_all_deck_names()):
+        info = deck_manager.get_deck_info(name) or {}
+        cards = info.get("cards")
+        print(f"{name}\t{'?' if cards is None else cards}")
+    return 0
+
+
+def cmd_add(deck_manager, args):
+    deck = _open_deck(deck_manager, args.deck, create=True)
+    if deck is None:
+        return _error(f"could not open deck '{args.deck}'")
+    deck_manager.add_card(deck, Card(args.front, args.back))
+    return 0
+
+
+def cmd_import(deck_manager, args):
+    deck = _open_deck(deck_manager, args.deck, create=True)
+    if deck is None:
+        return _error(f"could not open deck '{args.deck}'")
+    try:
+        added, skipped = deck_manager.import_cards(deck, args.file, args.format)
+    except OSError as e:
+        return _error(f"could not read {args.file}: {e.strerror}")
+    print(f"Imported {added} card(s) into {deck.name}, skipped {skipped} duplicate(s).")
+    return 0
+
+
+def cmd_export(deck_manager, args):
+    deck = deck_manager.get_deck(args.deck)
+    if deck is None:
+        return _error(f"no deck named '{args.deck}'")
+    out = open(args.file, 'w', newline='' if args.format != 'json' else None) if args.file else sys.stdout
+    try:
+        if args.format == 'json':
+            write_deck_json(out, deck, deck_manager.indent)
+            out.write("\n")
+        else:
+            writer = csv.writer(out, delimiter=',' if args.format == 'csv' else '\t')
+            writer.writerows((card.front, card.back) for card in deck.cards)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_stats(deck_manager, args):
+    names = [args.deck] if args.deck else sorted(deck_manager.get_all_deck_names())
+    since = time.time() - args.days * DAY if args.days is not None else None
+    total = 0
+    for name in names:
+        info = deck_manager.get_deck_info(name)
+        if info is None:
+            return _error(f"no deck named '{name}'")
+        cards = info.get("cards")
+        if cards is None:  # count not indexed, e.g. the file is unreadable
+            deck = deck_manager.get_deck(name)
+            cards = len(deck.cards) if deck else 0
+        total += cards
+        size = info.get("size")
+        print(f"{name}: {cards} card(s)" + (f", {size} bytes" if size is not None else ""))
+        reviews = deck_manager.review_stats(name, since)
+        if reviews["reviews"]:
+            print(f"  {reviews['reviews']} review(s) of {reviews['cards']} card(s): "
+                  f"{reviews['got_it']} got it, {reviews['aw_man']} aw man, {reviews['retry']} retry; "
+                  f"avg {reviews['avg_latency']:.1f}s per card")
+    if not args.deck:
+        print(f"Total: {total} card(s) in {len(names)} deck(s)")
+    return 0
+
+
+def cmd_search(deck_manager, args):
+    results = deck_manager.search(args.query, args.limit, args.deck)
+    for deck_name, _, front, back in results:
+        print(f"{deck_name}\t{' '.join(front.split())}\t{' '.join(back.split())}")
+    return 0 if results else 1
+
+
+def cmd_compact(deck_manager, args):
+    if args.deck is not None and deck_manager.get_deck_info(args.deck) is None:
+        return _error(f"no deck named '{args.deck}'")
+    deck_manager.compact(args.deck)
+    return 0
+
+
+def cmd_convert(deck_manager, args):
+    if deck_manager.get_deck(args.deck) is None:
+        return _error(f"no deck named '{args.deck}'")
+    if deck_manager.convert_deck(args.deck, args.format):
+        print(f"Converted {args.deck} to {args.format}.")
+    else:
+        print(f"{args.deck} is already stored as {args.format}.")
+    return 0
+
+
+def cmd_migrate(deck_manager, args):
+    from models.sqlite_deck_manager import SQLiteDeckManager
+    if isinstance(deck_manager, SQLiteDeckManager):
+        return _error("migrate copies the JSON decks into the database; run it without --sqlite")
+    sqlite_manager = SQLiteDeckManager(fsync=deck_manager.fsync)
+    try:
+        imported = sqlite_manager.import_json_decks(deck_manager)
+    finally:
+        sqlite_manager.close()
+    for name in imported:
+        print(f"Imported {name}")
+    print(f"Migrated {len(imported)} deck(s). Run with --sqlite to use them.")
+    return 0
+
+
+COMMANDS = {
+    'list': cmd_list,
+    'add': cmd_add,
+    'import': cmd_import,
+    'export': cmd_export,
+    'stats': cmd_stats,
+    'search': cmd_search,
+    'compact': cmd_compact,
+    'convert': cmd_convert,
+    'migrate': cmd_migrate,
+}
+
+
+def run_command(args, deck_manager):
+    """Runs a headless subcommand and returns its exit status."""
+    try:
+        status = COMMANDS[args.command](deck_manager, args)
+        deck_manager.flush()
+        return status
+    except (ValueError, StorageError, OSError, sqlite3.Error) as e:
+        return _error(str(e))
@@ -1,17 +1,41 @@
-import curses
 import argparse
-from ui.main import TUI
-from ui.input_handler import SimpleInputHandler
-from ui.vim_input_handler import VimInputHandler
+import sqlite3
+import sys
+from cli.commands import add_subcommands, run_command
+from models.deck_manager import DeckManager
 def parse_args():
     parser = argparse.ArgumentParser(description="Flashcard Application")
     parser.add_argument('--novim', action='store_true', help='Use Vim-style input mode')
+    parser.add_argument('--journal', action='store_true', help='Journal card edits instead of rewriting the deck file')
+    parser.add_argument('--no-fsync', action='store_true', help='Skip fsync on deck writes (faster, less durable)')
+    parser.add_argument('--save-on-exit', action='store_true', help='Batch deck saves until idle or exit')
+    parser.add_argument('--compact-json', action='store_true', help='Write deck files without indentation (smaller files)')
+    parser.add_argument('--sqlite', action='store_true', help='Store decks in flashcards/flashcards.db instead of JSON files')
+
+    subparsers = parser.add_subparsers(dest='command')
+    add_subcommands(subparsers)
     return parser.parse_args()
 
-def main():
-    """Main function to initialize and run the TUI."""
-    args = parse_args()
-    
+def create_deck_manager(args):
+    """Creates the storage backend selected on the command line."""
+    if args.sqlite:
+        from models.sqlite_deck_manager import SQLiteDeckManager
+        return SQLiteDeckManager(fsync=not args.no_fsync, deferred=args.save_on_exit)
+    return DeckManager(
+        journal=args.journal,
+        fsync=not args.no_fsync,
+        deferred=args.save_on_exit,
+        indent=None if args.compact_json else 4
+    )
+
+def run_tui(args):
+    """Initializes curses and runs the TUI."""
+    # imported here so headless subcommands never load curses
+    import curses
+    from ui.main import TUI
+    from ui.input_handler import SimpleInputHandler
+    from ui.vim_input_handler import VimInputHandler
+
     try:
         stdscr = curses.initscr()
         curses.noecho()
@@ -21,7 +45,8 @@ def main():
         InputHandlerClass = SimpleInputHandler if args.novim else VimInputHandler
         input_handler = InputHandlerClass(stdscr)
 
-        app = TUI(stdscr, input_handler)
+        deck_manager = create_deck_manager(args)
+        app = TUI(stdscr, input_handler, deck_manager)
         app.run()
 
     except KeyboardInterrupt:
@@ -33,5 +58,16 @@ def main():
             curses.echo()
             curses.endwin()
 
+def main():
+    """Main function: runs a headless subcommand, or the TUI when none is given."""
+    args = parse_args()
+    if args.command:
+        try:
+            deck_manager = create_deck_manager(args)
+        except (OSError, sqlite3.Error) as e:
+            sys.exit(f"flash: {e}")
+        sys.exit(run_command(args, deck_manager))
+    run_tui(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
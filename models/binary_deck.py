@@ -0,0 +1,187 @@
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import MutableSequence
+from models.card import Card, legacy_card_id
+from models.deck import Deck
+
+BINARY_EXTENSION = ".fdeck"
+MAGIC = b"FLDK"
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+
+# Layout (little-endian):
+#   header   magic(4s) version(H) reserved(H) name_len(I) card_count(Q)
+#   name     name_len bytes of UTF-8
+#   offsets  3 * card_count + 1 u64 offsets into the string table
+#   strings  UTF-8 card ids, fronts and backs, interleaved: id 0, front 0, back 0, id 1, ...
+# Version 1 files have no ids (2 strings per card); their cards get legacy_card_id()s.
+_HEADER = struct.Struct("<4sHHIQ")
+_OFFSET = struct.Struct("<Q")
+
+
+def read_header(f):
+    """Reads (name, card_count) from the start of a binary deck file."""
+    magic, version, _, name_len, card_count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC or version not in SUPPORTED_VERSIONS:
+        raise ValueError("Not a binary deck file")
+    return f.read(name_len).decode('utf-8'), card_count
+
+
+class BinaryCardTable:
+    """Read-only, memory-mapped view of the card strings in a binary deck file."""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, name_len, card_count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version not in SUPPORTED_VERSIONS:
+            self._mm.close()
+            raise ValueError("Not a binary deck file")
+        name_start = _HEADER.size
+        self.name = self._mm[name_start:name_start + name_len].decode('utf-8')
+        self.card_count = card_count
+        self._fields = 3 if version >= 2 else 2  # strings per card
+        self._legacy_ids = None  # version 1 only, derived on first use
+        self._offsets_start = name_start + name_len
+        self._strings_start = self._offsets_start + (self._fields * card_count + 1) * _OFFSET.size
+
+    def __len__(self):
+        return self.card_count
+
+    def raw(self, slot):
+        """Returns the UTF-8 bytes of string `slot` in the string table."""
+        pos = self._offsets_start + slot * _OFFSET.size
+        start = _OFFSET.unpack_from(self._mm, pos)[0]
+        end = _OFFSET.unpack_from(self._mm, pos + _OFFSET.size)[0]
+        return self._mm[self._strings_start + start:self._strings_start + end]
+
+    def raw_card(self, i):
+        """Returns (id, front, back) of card `i` as UTF-8 bytes."""
+        if self._fields == 2:
+            return self.card_id(i).encode('ascii'), self.raw(2 * i), self.raw(2 * i + 1)
+        return self.raw(3 * i), self.raw(3 * i + 1), self.raw(3 * i + 2)
+
+    def card_id(self, i):
+        if self._fields == 3:
+            return self.raw(3 * i).decode('utf-8')
+        if self._legacy_ids is None:
+            # ids of duplicate cards depend on the cards before them, so derive them all at once
+            seen = set()
+            self._legacy_ids = [
+                legacy_card_id(self.raw(2 * j).decode('utf-8'), self.raw(2 * j + 1).decode('utf-8'), seen)
+                for j in range(self.card_count)
+            ]
+        return self._legacy_ids[i]
+
+    def card(self, i):
+        card_id, front, back = self.raw_card(i)
+        return Card(front.decode('utf-8'), back.decode('utf-8'), card_id.decode('utf-8'))
+
+    def close(self):
+        self._mm.close()
+
+
+class MappedCardList(MutableSequence):
+    """List of cards backed by a BinaryCardTable, materializing Card objects on access.
+
+    Each position holds a reference: a non-negative value is a row in the
+    mapped table, a negative value -(k + 1) is the k-th card added since
+    loading. Touched rows are cached so edits to the returned Card stick.
+    """
+    def __init__(self, table):
+        self._table = table
+        self._refs = array('q', range(len(table)))
+        self._loaded = {}  # table row -> Card
+        self._added = []
+
+    def __len__(self):
+        return len(self._refs)
+
+    def _card(self, ref):
+        if ref < 0:
+            return self._added[-ref - 1]
+        card = self._loaded.get(ref)
+        if card is None:
+            card = self._loaded[ref] = self._table.card(ref)
+        return card
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._card(ref) for ref in self._refs[index]]
+        return self._card(self._refs[index])
+
+    def __setitem__(self, index, card):
+        if isinstance(index, slice):
+            raise TypeError("slice assignment is not supported")
+        self._added.append(card)
+        self._refs[index] = -len(self._added)
+
+    def __delitem__(self, index):
+        del self._refs[index]
+
+    def insert(self, index, card):
+        self._added.append(card)
+        self._refs.insert(index, -len(self._added))
+
+    def iter_raw(self):
+        """Yields (id, front, back) as UTF-8 bytes, copying untouched rows without decoding them."""
+        for ref in self._refs:
+            if ref >= 0 and ref not in self._loaded:
+                yield self._table.raw_card(ref)
+            else:
+                card = self._card(ref)
+                yield card.id.encode('utf-8'), card.front.encode('utf-8'), card.back.encode('utf-8')
+
+    def iter_ids(self):
+        """Yields the card ids in order without materializing Card objects."""
+        for ref in self._refs:
+            if ref >= 0 and ref not in self._loaded:
+                yield self._table.card_id(ref)
+            else:
+                yield self._card(ref).id
+
+    def release(self):
+        """Loads every card into memory and unmaps the file (needed before replacing it on Windows)."""
+        cards = [self._card(ref) for ref in self._refs]
+        self._added = cards
+        self._refs = array('q', range(-1, -len(cards) - 1, -1))
+        self._loaded = {}
+        self._table.close()
+
+
+def load_binary_deck(path):
+    """Opens a binary deck file as a Deck whose cards are loaded lazily by index."""
+    table = BinaryCardTable(path)
+    return Deck(table.name, MappedCardList(table))
+
+
+def write_binary_deck(f, deck):
+    """Writes a deck in the binary format to a seekable binary file."""
+    if isinstance(deck.cards, MappedCardList):
+        rows = deck.cards.iter_raw()
+    else:
+        rows = ((c.id.encode('utf-8'), c.front.encode('utf-8'), c.back.encode('utf-8')) for c in deck.cards)
+
+    name = deck.name.encode('utf-8')
+    card_count = len(deck.cards)
+    f.write(_HEADER.pack(MAGIC, VERSION, 0, len(name), card_count))
+    f.write(name)
+    offsets_pos = f.tell()
+    f.seek((3 * card_count + 1) * _OFFSET.size, os.SEEK_CUR)  # filled in below
+
+    offsets = array('Q', [0])
+    for row in rows:
+        for field in row:
+            f.write(field)
+            offsets.append(offsets[-1] + len(field))
+
+    end = f.tell()
+    f.seek(offsets_pos)
+    if offsets.itemsize != _OFFSET.size:
+        raise ValueError("Unsupported platform for binary decks")
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        offsets.byteswap()  # the format is little-endian
+    f.write(offsets.tobytes())
+    f.seek(end)
+
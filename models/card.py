@@ -1,11 +1,46 @@
+import hashlib
+import secrets
+
+
+def new_card_id():
+    """Returns a random id for a newly created card."""
+    return secrets.token_hex(8)
+
+
+def legacy_card_id(front, back, seen=None):
+    """Returns a content-derived id for a card saved before cards had ids.
+
+    The id only depends on the card's text, so it is the same every time an
+    old deck is loaded. Pass the set of ids already used in the deck as
+    `seen` to give duplicate cards distinct ids (in deck order); the new id
+    is added to it.
+    """
+    card_id = hashlib.sha1(f"{front}\0{back}".encode('utf-8')).hexdigest()[:16]
+    if seen is not None:
+        n = 0
+        base = card_id
+        while card_id in seen:
+            n += 1
+            card_id = hashlib.sha1(f"{base}\0{n}".encode('utf-8')).hexdigest()[:16]
+        seen.add(card_id)
+    return card_id
+
+
 class Card:
-    def __init__(self, front: str, back: str):
+    __slots__ = ("front", "back", "id")  # no per-instance __dict__; large decks hold many cards
+
+    def __init__(self, front: str, back: str, id=None):
         self.front = front
         self.back = back
+        self.id = id or new_card_id()  # stable across edits, moves and shuffles
 
     def to_dict(self):
-        return {"front": self.front, "back": self.back}
+        return {"id": self.id, "front": self.front, "back": self.back}
 
     @classmethod
-    def from_dict(cls, data):
-        return cls(data["front"], data["back"])
\ No newline at end of file
+    def from_dict(cls, data, seen=None):
+        """Builds a card from its dict form; `seen` is passed to legacy_card_id for cards without an id."""
+        card_id = data.get("id") or legacy_card_id(data["front"], data["back"], seen)
+        if seen is not None:
+            seen.add(card_id)
+        return cls(data["front"], data["back"], card_id)
@@ -1,3 +1,4 @@
+import bisect
 import random
 from models.card import Card
 
@@ -5,12 +6,27 @@ class Deck:
     def __init__(self, name: str, cards=None):
         self.name = name
         self.cards = cards or []
+        self._positions = None  # card id -> index in self.cards when built, built on first lookup
+        self._removed = []  # sorted _positions values of cards removed since it was built
+
+    def _slot_index(self, slot):
+        """Turns a _positions value into a current index: one less for every earlier removal."""
+        return slot - bisect.bisect_left(self._removed, slot)
 
     def add_card(self, card):
         self.cards.append(card)
+        if self._positions is not None:
+            self._positions[card.id] = len(self.cards) - 1 + len(self._removed)
 
     def remove_card(self, index):
         if 0 <= index < len(self.cards):
+            if self._positions is not None:
+                # record the gap instead of renumbering every later card
+                slot = self._positions.pop(self.cards[index].id, None)
+                if slot is not None and self._slot_index(slot) == index:
+                    bisect.insort(self._removed, slot)
+                else:
+                    self._positions = None
             del self.cards[index]
 
     def edit_card(self, index: int, front=None, back=None):
@@ -20,12 +36,45 @@ class Deck:
             if back is not None:
                 self.cards[index].back = back
 
+    def index_of(self, card_id):
+        """Returns the position of the card with this id, or None if it is not in the deck."""
+        if self._positions is not None:
+            slot = self._positions.get(card_id)
+            if slot is not None:
+                index = self._slot_index(slot)
+                if index < len(self.cards) and self.cards[index].id == card_id:
+                    return index
+        # first lookup, or self.cards was changed directly; rebuild once
+        iter_ids = getattr(self.cards, "iter_ids", None)  # avoids loading every card of a mapped deck
+        ids = iter_ids() if iter_ids else (card.id for card in self.cards)
+        self._positions = {card_id: i for i, card_id in enumerate(ids)}
+        self._removed = []
+        return self._positions.get(card_id)
+
+    def get_card(self, card_id):
+        """Returns the card with this id, or None."""
+        index = self.index_of(card_id)
+        return None if index is None else self.cards[index]
+
+    def edit_card_by_id(self, card_id, front=None, back=None):
+        index = self.index_of(card_id)
+        if index is not None:
+            self.edit_card(index, front, back)
+
+    def remove_card_by_id(self, card_id):
+        index = self.index_of(card_id)
+        if index is not None:
+            self.remove_card(index)
+
     def shuffle(self):
         random.shuffle(self.cards)
+        self._positions = None
+        self._removed = []
 
     def to_dict(self):
         return {"name": self.name, "cards": [c.to_dict() for c in self.cards]}
 
     @classmethod
     def from_dict(cls, data):
-        return cls(data["name"], [Card.from_dict(c) for c in data.get("cards", [])])
\ No newline at end of file
+        seen = set()
+        return cls(data["name"], [Card.from_dict(c, seen) for c in data.get("cards", [])])
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import struct
+from models.binary_deck import BINARY_EXTENSION, read_header
+from models.json_stream import iter_deck_json
+from models.storage import atomic_open
+
+INDEX_FILENAME = ".index"
+DECK_EXTENSIONS = (".json", BINARY_EXTENSION)
+
+
+def file_hash(path):
+    """Returns the SHA-1 of a file, read in chunks."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashingWriter:
+    """File wrapper that hashes everything written through it."""
+    def __init__(self, f):
+        self._f = f
+        self._hash = hashlib.sha1()
+
+    def write(self, data):
+        self._hash.update(data.encode('utf-8'))
+        return self._f.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class DeckIndex:
+    """Persistent catalog of deck files, validated against file size and mtime.
+
+    Each entry records a deck's file size, mtime (ns), card count and SHA-1
+    content hash. Only deck files whose stat data no longer matches their
+    entry are re-read on refresh.
+    """
+    VERSION = 1
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, INDEX_FILENAME)
+        self.entries = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """Reads the index file, starting empty if it is missing or unreadable."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.entries = data.get("decks", {})
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            self.entries = {}
+
+    def save(self):
+        """Writes the index back to disk if it changed."""
+        if not self._dirty:
+            return
+        try:
+            # the index can always be rebuilt from the deck files, so skip fsync
+            with atomic_open(self.path, fsync=False) as f:
+                json.dump({"version": self.VERSION, "decks": self.entries}, f)
+            self._dirty = False
+        except OSError as e:
+            print(f"Error saving deck index: {e}")
+
+    def _describe(self, filepath, st):
+        """Builds an entry by reading a deck file that is new or has changed."""
+        try:
+            if filepath.endswith(BINARY_EXTENSION):
+                with open(filepath, 'rb') as f:
+                    card_count = read_header(f)[1]
+            else:
+                with open(filepath, 'r') as f:
+                    card_count = sum(1 for kind, _ in iter_deck_json(f) if kind == "card")
+        except (ValueError, struct.error):
+            card_count = None
+        return {
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "cards": card_count,
+            "hash": file_hash(filepath),
+        }
+
+    def refresh(self):
+        """Syncs the index with the data directory using a single scandir pass."""
+        seen = set()
+        with os.scandir(self.data_dir) as entries:
+            for entry in entries:
+                deck_name, ext = os.path.splitext(entry.name)
+                if ext not in DECK_EXTENSIONS or not entry.is_file():
+                    continue
+                seen.add(deck_name)
+                st = entry.stat()
+                known = self.entries.get(deck_name)
+                if known and known["size"] == st.st_size and known["mtime"] == st.st_mtime_ns:
+                    continue
+                try:
+                    self.entries[deck_name] = self._describe(entry.path, st)
+                except OSError:
+                    continue
+                self._dirty = True
+
+        for deck_name in list(self.entries):
+            if deck_name not in seen:
+                del self.entries[deck_name]
+                self._dirty = True
+
+        self.save()
+        return self.entries
+
+    def update(self, deck_name, filepath, card_count, content_hash):
+        """Records a deck file that was just written by the application."""
+        st = os.stat(filepath)
+        self.entries[deck_name] = {
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "cards": card_count,
+            "hash": content_hash,
+        }
+        self._dirty = True
+        self.save()
+
+    def set_card_count(self, deck_name, card_count):
+        """Updates the card count of a deck whose changes live outside its JSON file."""
+        entry = self.entries.get(deck_name)
+        if entry and entry["cards"] != card_count:
+            entry["cards"] = card_count
+            self._dirty = True
+            self.save()
+
+    def rename(self, old_name, new_name):
+        if old_name in self.entries:
+            self.entries[new_name] = self.entries.pop(old_name)
+            self._dirty = True
+            self.save()
+
+    def remove(self, deck_name):
+        if self.entries.pop(deck_name, None) is not None:
+            self._dirty = True
+            self.save()
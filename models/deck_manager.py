@@ -1,17 +1,40 @@
 import json
 import os
 import re
+import sqlite3
+import time
 from models.deck import Deck
-from models.card import Card
+from models.binary_deck import BINARY_EXTENSION, load_binary_deck, write_binary_deck, MappedCardList
+from models.deck_index import DeckIndex, HashingWriter, file_hash
+from models.importer import import_cards
+from models.journal import DeckJournal
+from models.json_stream import read_deck_json, write_deck_json
+from models.review_log import ReviewLog
+from models.scheduler import Scheduler
+from models.search_index import SEARCH_INDEX_FILENAME, SearchIndex
+from models.storage import StorageError, atomic_open
 
 DATA_DIR = "flashcards"
 
 class DeckManager:
     MAX_FILENAME_LENGTH = 50  # Maximum length for deck names
+    JOURNAL_COMPACT_BYTES = 256 * 1024  # fold the journal into the snapshot past this size
+    DEFERRED_SAVE_SECONDS = 30  # max age of unsaved changes in deferred mode
+    SIDECAR_EXTENSIONS = (".journal", ".sched", ".reviews")  # per-deck files that follow renames/deletes
 
-    def __init__(self):
+    def __init__(self, journal=False, fsync=True, deferred=False, indent=4):
         self.decks = {}
+        self.indent = indent  # JSON indentation for deck files; None writes compact JSON
+        self.journal = journal  # log card edits instead of rewriting the deck file
+        self.fsync = fsync  # flush deck writes to disk before reporting success
+        self.deferred = deferred  # batch saves until idle/exit instead of saving every change
+        self._unsaved = {}  # sanitized deck name -> deck with changes not yet written
+        self._unsaved_since = None
+        self._schedules = {}  # sanitized deck name -> Scheduler loaded this session
+        self._review_logs = {}  # sanitized deck name -> ReviewLog, so stats only read new records
         self._ensure_directories()
+        self._index = DeckIndex(DATA_DIR)
+        self._search = None  # SearchIndex, opened on first use
 
     def _ensure_directories(self):
         """Ensures that the data and import directories exist."""
@@ -36,34 +59,339 @@ class DeckManager:
             
         return safe_name
 
-    def _deck_filepath(self, deck_name):
-        """Returns the file path for a given deck name."""
+    def _deck_filepath(self, deck_name, fmt=None):
+        """Returns the file path for a given deck name.
+
+        Without an explicit format, this is the deck's binary file if it has
+        one and its JSON file otherwise.
+        """
         safe_name = self._sanitize_filename(deck_name)
         if not safe_name:
             raise ValueError("Invalid deck name")
+        binary_path = os.path.join(DATA_DIR, f"{safe_name}{BINARY_EXTENSION}")
+        if fmt == "binary" or (fmt is None and os.path.isfile(binary_path)):
+            return binary_path
         return os.path.join(DATA_DIR, f"{safe_name}.json")
 
+    def _journal(self, deck_name):
+        """Returns the card operation journal for a deck."""
+        return DeckJournal(self._sidecar_path(deck_name, ".journal"), fsync=self.fsync)
+
+    def _sidecar_path(self, deck_name, ext):
+        """Returns the path of a per-deck file stored next to the deck (journal, schedule)."""
+        return os.path.join(DATA_DIR, f"{self._sanitize_filename(deck_name)}{ext}")
+
+    def _schedule_stamp(self, deck_name):
+        """Returns what a schedule records about its deck's storage: file size, mtime and journal size.
+
+        A schedule saved with another stamp may have missed cards added or
+        removed outside this manager, so its new cards are found again.
+        """
+        try:
+            st = os.stat(self._deck_filepath(deck_name))
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime_ns, self._journal(deck_name).size()]
+
+    def load_schedule(self, deck_name):
+        """Loads the spaced-repetition state of a deck's cards."""
+        name = self._sanitize_filename(deck_name)
+        if name in self._schedules:
+            return self._schedules[name]
+        try:
+            with open(self._sidecar_path(name, ".sched"), 'r') as f:
+                data = json.load(f)
+            scheduler = Scheduler(data.get("cards", {}), data.get("queue"), data.get("new"))
+            scheduler.stamp = data.get("stamp")
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            scheduler = Scheduler()
+        if scheduler.new is None or scheduler.stamp != self._schedule_stamp(name):
+            deck = self.get_deck(name)
+            if deck is not None:
+                iter_ids = getattr(deck.cards, "iter_ids", None)
+                scheduler.seed_new(iter_ids() if iter_ids else (card.id for card in deck.cards))
+        self._schedules[name] = scheduler
+        return scheduler
+
+    def save_schedule(self, deck_name, scheduler):
+        """Saves the spaced-repetition state of a deck's cards if it changed."""
+        stamp = self._schedule_stamp(deck_name)
+        if not scheduler.changed and scheduler.stamp == stamp:
+            return
+        try:
+            with atomic_open(self._sidecar_path(deck_name, ".sched"), fsync=self.fsync) as f:
+                json.dump({"version": 2, "cards": scheduler.states, "queue": scheduler.queue,
+                           "new": scheduler.new, "stamp": stamp}, f)
+        except OSError as e:
+            raise StorageError(f"Error saving schedule: {e}")
+        scheduler.stamp = stamp
+        scheduler.mark_saved()
+
+    def _loaded_schedule(self, deck_name):
+        """Returns the deck's schedule if it has one, loading it before the deck is written."""
+        name = self._sanitize_filename(deck_name)
+        if name in self._schedules or os.path.exists(self._sidecar_path(name, ".sched")):
+            return self.load_schedule(name)
+        return None  # never studied; new cards are taken from the deck on first load
+
+    def _save_loaded_schedules(self):
+        """Writes the loaded schedules whose cards or deck changed since they were saved."""
+        for name, scheduler in self._schedules.items():
+            self.save_schedule(name, scheduler)
+
+    def review_log(self, deck_name):
+        """Returns the append-only log of study ratings for a deck; close() it when done.
+
+        The log is kept for the manager's lifetime (closing only releases its
+        file), so review_stats reuses the totals it has already read.
+        """
+        name = self._sanitize_filename(deck_name)
+        if name not in self._review_logs:
+            self._review_logs[name] = ReviewLog(self._sidecar_path(name, ".reviews"), fsync=self.fsync)
+        return self._review_logs[name]
+
+    def _forget_review_log(self, deck_name):
+        review_log = self._review_logs.pop(deck_name, None)
+        if review_log is not None:
+            review_log.close()
+
+    def review_stats(self, deck_name, since=None):
+        """Returns rating counts, average latency and cards reviewed for a deck."""
+        return self.review_log(deck_name).stats(since)
+
+    def search_index(self):
+        """Returns the full-text index of every deck's cards, opening it on first use."""
+        if self._search is None:
+            self._search = SearchIndex.open(os.path.join(DATA_DIR, SEARCH_INDEX_FILENAME), self.fsync)
+        return self._search
+
+    def _update_search(self, update, *args):
+        """Runs update(index, *args) on the search index and commits it; returns whether it did.
+
+        The index can be rebuilt from the decks, so a failure here is only
+        reported; search() re-indexes decks whose version does not match.
+        """
+        try:
+            update(self.search_index(), *args)
+            self._commit_search()
+            return True
+        except sqlite3.Error as e:
+            self._rollback_search()
+            print(f"Error updating search index: {e}")
+            return False
+
+    def _update_card_search(self, update, deck_name, *args):
+        """Runs a card-level update(index, deck_name, *args) after the card change was saved.
+
+        Saving the deck already recorded its new version, so if the update
+        fails the version is dropped; otherwise search() would trust it and
+        never index the card.
+        """
+        if not self._update_search(update, deck_name, *args):
+            self._update_search(SearchIndex.forget_version, deck_name)
+
+    def _commit_search(self):
+        self.search_index().commit()
+
+    def _rollback_search(self):
+        if self._search is not None:
+            self._search.rollback()
+
+    def _search_version(self, deck_name):
+        """Returns what the search index records for an up-to-date deck: its file's content hash."""
+        info = self._index.entries.get(deck_name)
+        return info.get("hash") if info else None
+
+    def _sync_search(self, index):
+        """Re-indexes decks changed outside this manager or saved before the index existed.
+
+        Only decks whose recorded version differs are read.
+        """
+        names = set(self.get_all_deck_names())
+        versions = index.versions()
+        for name in set(versions) - names:
+            index.remove_deck(name)
+        for name in names:
+            if name in self._unsaved:  # deferred changes are not in the file yet
+                index.index_deck(name, self._unsaved[name].cards, None)
+            elif name not in versions or versions[name] != self._search_version(name):
+                deck = self.get_deck(name)
+                if deck is not None:
+                    index.index_deck(name, deck.cards, self._search_version(name))
+
+    def search(self, query, limit=50, deck_name=None):
+        """Returns up to `limit` (deck, card id, front, back) for cards containing every word of `query`."""
+        self._update_search(self._sync_search)
+        try:
+            return self.search_index().search(query, limit, deck_name)
+        except sqlite3.Error as e:
+            print(f"Error searching cards: {e}")
+            return []
+
     def _load_deck(self, deck_name):
         """Loads a deck from its individual file."""
         filepath = self._deck_filepath(deck_name)
         try:
-            with open(filepath, 'r') as f:
-                deck_data = json.load(f)
-                return Deck.from_dict(deck_data)
+            if filepath.endswith(BINARY_EXTENSION):
+                deck = load_binary_deck(filepath)
+            else:
+                with open(filepath, 'r') as f:
+                    deck = read_deck_json(f)
+            # replay edits journaled since the last snapshot, even if journaling is now off
+            return self._journal(deck_name).replay(deck)
         except (FileNotFoundError, json.JSONDecodeError):
             return None
         except Exception as e:
             print(f"Error loading deck {deck_name}: {e}")
             return None
 
-    def _save_deck(self, deck):
-        """Saves a deck to its individual file."""
+    def _save_deck(self, deck, fmt=None):
+        """Saves a deck to its individual file, atomically replacing the old one."""
+        try:
+            safe_name = self._sanitize_filename(deck.name)
+            old_version = self._search_version(safe_name)
+            filepath = self._deck_filepath(deck.name, fmt)
+            if filepath.endswith(BINARY_EXTENSION):
+                with atomic_open(filepath, 'wb', fsync=self.fsync) as f:
+                    write_binary_deck(f, deck)
+                    if os.name == 'nt' and isinstance(deck.cards, MappedCardList):
+                        deck.cards.release()  # Windows cannot replace a mapped file
+                content_hash = file_hash(filepath)
+            else:
+                with atomic_open(filepath, fsync=self.fsync) as f:
+                    writer = HashingWriter(f)
+                    write_deck_json(writer, deck, self.indent)
+                content_hash = writer.hexdigest()
+            self._index.update(safe_name, filepath, len(deck.cards), content_hash)
+            self._journal(deck.name).clear()
+            self._unsaved.pop(safe_name, None)
+        except Exception as e:
+            raise StorageError(f"Error saving deck: {e}")
+        if safe_name in self._schedules:
+            self.save_schedule(safe_name, self._schedules[safe_name])  # record the new deck file
+        self._update_search(SearchIndex.set_version, safe_name, content_hash, old_version)
+
+    def save_deck(self, deck):
+        """Saves a full snapshot of a deck, or queues it when saves are deferred."""
+        if not self.deferred:
+            self._save_deck(deck)
+            return
+        if not self._unsaved:
+            self._unsaved_since = time.monotonic()
+        self._unsaved[self._sanitize_filename(deck.name)] = deck
+
+    def flush(self):
+        """Writes every deck with deferred changes."""
+        for deck in list(self._unsaved.values()):
+            self._save_deck(deck)
+        self._unsaved_since = None
+        self._save_loaded_schedules()  # e.g. cards journaled since the schedule was written
+
+    def flush_if_idle(self):
+        """Writes deferred changes once the oldest has waited DEFERRED_SAVE_SECONDS."""
+        if self._unsaved and time.monotonic() - self._unsaved_since >= self.DEFERRED_SAVE_SECONDS:
+            self.flush()
+
+    def _record(self, deck, op):
+        """Persists a single card operation, journaling it when enabled."""
+        if not self.journal:
+            self.save_deck(deck)
+            return
         try:
-            filepath = self._deck_filepath(deck.name)
-            with open(filepath, 'w') as f:
-                json.dump(deck.to_dict(), f, indent=4)
+            journal_size = self._journal(deck.name).append(op)
         except Exception as e:
-            raise Exception(f"Error saving deck: {e}")
+            raise StorageError(f"Error saving deck: {e}")
+        self._index.set_card_count(self._sanitize_filename(deck.name), len(deck.cards))
+        if journal_size > self.JOURNAL_COMPACT_BYTES:
+            self._save_deck(deck)
+
+    def add_card(self, deck, card):
+        """Adds a card to a deck and persists the change."""
+        scheduler = self._loaded_schedule(deck.name)
+        deck.add_card(card)
+        if scheduler is not None:
+            scheduler.add_card(card.id, len(deck.cards) - 1)
+        self._record(deck, {"op": "add", "id": card.id, "front": card.front, "back": card.back})
+        self._update_card_search(SearchIndex.update_card, self._sanitize_filename(deck.name), card)
+
+    def edit_card(self, deck, card_id, front=None, back=None):
+        """Edits the card with id `card_id` and persists the change."""
+        if deck.index_of(card_id) is None or (front is None and back is None):
+            return
+        self._loaded_schedule(deck.name)  # so it is saved with the rewritten deck's stamp
+        deck.edit_card_by_id(card_id, front, back)
+        op = {"op": "edit", "id": card_id}
+        if front is not None:
+            op["front"] = front
+        if back is not None:
+            op["back"] = back
+        self._record(deck, op)
+        self._update_card_search(SearchIndex.update_card, self._sanitize_filename(deck.name), deck.get_card(card_id))
+
+    def remove_card(self, deck, card_id):
+        """Removes the card with id `card_id` and persists the change."""
+        if deck.index_of(card_id) is None:
+            return
+        scheduler = self._loaded_schedule(deck.name)
+        deck.remove_card_by_id(card_id)
+        if scheduler is not None:
+            scheduler.remove_card(card_id)
+        self._record(deck, {"op": "delete", "id": card_id})
+        self._update_card_search(SearchIndex.remove_card, self._sanitize_filename(deck.name), card_id)
+
+    def import_cards(self, deck, path, fmt=None):
+        """Bulk-imports cards from a CSV/TSV/Anki text file with one save at the end.
+
+        Returns (added, skipped), where skipped counts duplicate cards. If the
+        file cannot be read or the save fails, the deck is left as it was.
+        """
+        scheduler = self._loaded_schedule(deck.name)
+        added, skipped = import_cards(deck, path, fmt)
+        if added:
+            new_cards = [deck.cards[index] for index in range(len(deck.cards) - added, len(deck.cards))]
+            if scheduler is not None:
+                for index, card in enumerate(new_cards, len(deck.cards) - added):
+                    scheduler.add_card(card.id, index)
+            try:
+                self.save_deck(deck)
+            except Exception:
+                for card in new_cards:
+                    deck.remove_card(len(deck.cards) - 1)
+                    if scheduler is not None:
+                        scheduler.remove_card(card.id)
+                raise
+            self._update_card_search(SearchIndex.add_cards, self._sanitize_filename(deck.name), new_cards)
+        return added, skipped
+
+    def compact(self, name=None):
+        """Folds a deck's journal into its snapshot; every deck's when no name is given."""
+        if name is None:
+            for deck_name in self.get_all_deck_names():
+                self.compact(deck_name)
+            return
+        if self._journal(name).size() == 0:
+            return
+        deck = self.get_deck(name)
+        if deck:
+            self._loaded_schedule(name)
+            self._save_deck(deck)
+
+    def convert_deck(self, name, fmt):
+        """Rewrites a deck in another on-disk format ("json" or "binary")."""
+        if fmt not in ("json", "binary"):
+            raise ValueError(f"Unknown deck format: {fmt}")
+        old_filepath = self._deck_filepath(name)
+        if self._deck_filepath(name, fmt) == old_filepath:
+            return False
+        deck = self.get_deck(name)
+        if not deck:
+            return False
+        self._loaded_schedule(name)
+        self._save_deck(deck, fmt)
+        if isinstance(deck.cards, MappedCardList):
+            deck.cards.release()
+        os.remove(old_filepath)
+        return True
 
     def get_deck(self, name, load_if_not_found=True):
         """Gets a deck, loading it if necessary."""
@@ -71,21 +399,24 @@ class DeckManager:
             self.decks[name] = self._load_deck(name)
         return self.decks.get(name)
 
+    def _deck_exists(self, name):
+        """Checks whether a deck file exists without listing the whole directory."""
+        return os.path.isfile(self._deck_filepath(name))
+
     def get_all_deck_names(self):
         """Returns a list of all available deck names."""
-        deck_names = []
         try:
-            for filename in os.listdir(DATA_DIR):
-                if filename.endswith(".json"):
-                    deck_name = filename[:-5]  # remove ".json" extension
-                    if deck_name not in self.decks:
-                        deck = self._load_deck(deck_name)
-                        if deck:
-                            self.decks[deck_name] = deck
-                    deck_names.append(deck_name)
+            return list(self._index.refresh())
         except Exception as e:
             print(f"Error listing decks: {e}")
-        return deck_names
+            return []
+
+    def get_deck_info(self, name):
+        """Returns indexed metadata (size, mtime, cards, hash) for a deck, or None if unknown."""
+        if name not in self._index.entries:
+            self._index.refresh()
+        info = self._index.entries.get(name)
+        return dict(info) if info else None
 
     def create_deck(self, name):
         """Creates a new deck."""
@@ -94,7 +425,7 @@ class DeckManager:
             raise ValueError(f"Deck name must be between 1 and {self.MAX_FILENAME_LENGTH} characters")
 
         safe_name = self._sanitize_filename(name)
-        if safe_name in self.get_all_deck_names():
+        if self._deck_exists(safe_name):
             return False
 
         try:
@@ -108,12 +439,19 @@ class DeckManager:
 
     def delete_deck(self, name):
         """Deletes a deck."""
-        if name in self.get_all_deck_names():
+        if self._deck_exists(name):
             filepath = self._deck_filepath(name)
             try:
+                self._forget_review_log(name)
                 os.remove(filepath)
-                if name in self.decks:
-                    del self.decks[name]
+                for ext in self.SIDECAR_EXTENSIONS:
+                    if os.path.exists(self._sidecar_path(name, ext)):
+                        os.remove(self._sidecar_path(name, ext))
+                self._unsaved.pop(name, None)
+                self._schedules.pop(name, None)
+                self.decks.pop(name, None)
+                self._index.remove(name)
+                self._update_search(SearchIndex.remove_deck, name)
                 return True
             except Exception as e:
                 print(f"Error deleting deck file: {e}")
@@ -127,14 +465,26 @@ class DeckManager:
             raise ValueError(f"New deck name must be between 1 and {self.MAX_FILENAME_LENGTH} characters")
 
         safe_new_name = self._sanitize_filename(new_name)
-        if old_name in self.get_all_deck_names() and safe_new_name not in self.get_all_deck_names():
+        if self._deck_exists(old_name) and not self._deck_exists(safe_new_name):
             old_filepath = self._deck_filepath(old_name)
-            new_filepath = self._deck_filepath(safe_new_name)
+            new_filepath = self._deck_filepath(
+                safe_new_name, "binary" if old_filepath.endswith(BINARY_EXTENSION) else "json"
+            )
             try:
+                self._forget_review_log(old_name)
                 os.rename(old_filepath, new_filepath)
+                for ext in self.SIDECAR_EXTENSIONS:
+                    if os.path.exists(self._sidecar_path(old_name, ext)):
+                        os.rename(self._sidecar_path(old_name, ext), self._sidecar_path(safe_new_name, ext))
+                if old_name in self._unsaved:
+                    self._unsaved[safe_new_name] = self._unsaved.pop(old_name)
+                if old_name in self._schedules:
+                    self._schedules[safe_new_name] = self._schedules.pop(old_name)
                 if old_name in self.decks:
                     self.decks[safe_new_name] = self.decks.pop(old_name)
                     self.decks[safe_new_name].name = safe_new_name
+                self._index.rename(old_name, safe_new_name)
+                self._update_search(SearchIndex.rename_deck, old_name, safe_new_name)
                 return True
             except Exception as e:
                 print(f"Error renaming deck file: {e}")
@@ -0,0 +1,95 @@
+import csv
+import html
+import os
+import re
+from models.card import Card
+
+IMPORT_FORMATS = ("csv", "tsv", "anki")
+
+# separators named in an Anki "#separator:" header line
+_ANKI_SEPARATORS = {"tab": "\t", "comma": ",", "semicolon": ";", "pipe": "|", "space": " ", "colon": ":"}
+_ANKI_META_COLUMNS = ("guid", "notetype", "deck", "tags")
+_HTML_BREAK = re.compile(r"<br\s*/?>|</div>\s*<div>", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def detect_format(path):
+    """Guesses the import format from the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext == ".tsv":
+        return "tsv"
+    return "anki"  # Anki exports notes as tab-separated .txt
+
+
+def _html_to_text(text):
+    return html.unescape(_HTML_TAG.sub("", _HTML_BREAK.sub("\n", text)))
+
+
+def iter_rows(f, fmt):
+    """Yields (front, back) pairs from an open text file.
+
+    Rows with fewer than two fields or an empty front are skipped, as is a
+    leading "front,back" header row. For Anki
+    text exports, "#key:value" header lines set the separator, HTML
+    handling and which columns hold note metadata rather than fields.
+    """
+    delimiter = "," if fmt == "csv" else "\t"
+    is_html = False
+    meta_columns = set()
+
+    if fmt == "anki":
+        # header lines come first; read them before handing the file to csv
+        while True:
+            pos = f.tell()
+            line = f.readline()
+            if not line.startswith("#"):
+                f.seek(pos)
+                break
+            key, _, value = line[1:].strip().partition(":")
+            key, value = key.strip().lower(), value.strip()
+            if key == "separator":
+                delimiter = _ANKI_SEPARATORS.get(value.lower(), value[:1] or delimiter)
+            elif key == "html":
+                is_html = value.lower() == "true"
+            elif key.endswith(" column") and key[:-len(" column")] in _ANKI_META_COLUMNS and value.isdigit():
+                meta_columns.add(int(value) - 1)
+
+    for line_num, row in enumerate(csv.reader(f, delimiter=delimiter)):
+        fields = [field for i, field in enumerate(row) if i not in meta_columns]
+        if len(fields) < 2 or not fields[0].strip():
+            continue
+        if line_num == 0 and [field.strip().lower() for field in fields[:2]] == ["front", "back"]:
+            continue  # header row
+        front, back = fields[0], fields[1]
+        if is_html:
+            front, back = _html_to_text(front), _html_to_text(back)
+        yield front, back
+
+
+def import_cards(deck, path, fmt=None):
+    """Appends the cards in a CSV/TSV/Anki text file to a deck, skipping duplicates.
+
+    A card is a duplicate if a card with the same front and back is already
+    in the deck or earlier in the file. Returns (added, skipped). The cards
+    are only added once the whole file was read, so a file that fails part
+    way leaves the deck unchanged. The deck is not saved.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+    seen = {(card.front, card.back) for card in deck.cards}
+    new_cards = []
+    skipped = 0
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for front, back in iter_rows(f, fmt):
+            if (front, back) in seen:
+                skipped += 1
+                continue
+            seen.add((front, back))
+            new_cards.append(Card(front, back))
+    for card in new_cards:
+        deck.add_card(card)
+    return len(new_cards), skipped
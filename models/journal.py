@@ -0,0 +1,88 @@
+import json
+import os
+from models.card import Card, legacy_card_id
+
+
+class DeckJournal:
+    """Append-only log of card operations applied on top of a deck's JSON snapshot.
+
+    Each line is one JSON operation:
+        {"op": "add", "id": ..., "front": ..., "back": ...}
+        {"op": "edit", "id": ..., "front": ..., "back": ...}
+        {"op": "delete", "id": ...}
+    Journals written before cards had ids address cards by "index" instead.
+    """
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self._seen = None
+
+    def size(self):
+        """Returns the journal size in bytes (0 if it does not exist)."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def append(self, op):
+        """Appends one operation and returns the new journal size."""
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(op) + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+            return f.tell()
+
+    def replay(self, deck):
+        """Applies every logged operation to a deck loaded from the snapshot.
+
+        A torn final line left by an interrupted append is cut off, so later
+        appends start on a clean line.
+        """
+        valid_end = 0
+        self._seen = None  # ids in the deck, built for adds logged before cards had ids
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        break
+                    if not line.endswith(b"\n"):
+                        break
+                    self._apply(deck, op)
+                    valid_end += len(line)
+                torn = f.seek(0, os.SEEK_END) > valid_end
+            if torn:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(valid_end)
+        except FileNotFoundError:
+            pass
+        return deck
+
+    def _apply(self, deck, op):
+        kind = op.get("op")
+        if kind == "add":
+            card_id = op.get("id")
+            if card_id is None:
+                if self._seen is None:
+                    self._seen = {card.id for card in deck.cards}
+                card_id = legacy_card_id(op["front"], op["back"], self._seen)
+            deck.add_card(Card(op["front"], op["back"], card_id))
+        elif kind == "edit":
+            if "id" in op:
+                deck.edit_card_by_id(op["id"], op.get("front"), op.get("back"))
+            else:
+                deck.edit_card(op["index"], op.get("front"), op.get("back"))
+        elif kind == "delete":
+            if "id" in op:
+                deck.remove_card_by_id(op["id"])
+            else:
+                deck.remove_card(op["index"])
+
+    def clear(self):
+        """Removes the journal once its operations are folded into a snapshot."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,131 @@
+import json
+import re
+from models.card import Card
+from models.deck import Deck
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _StreamParser:
+    """Pulls JSON values one at a time out of a text file, reading it in chunks."""
+    def __init__(self, f):
+        self._f = f
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """Reads another chunk; returns False at end of file."""
+        if self._eof:
+            return False
+        chunk = self._f.read(CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos > CHUNK_SIZE:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += chunk
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        """Consumes and returns the next character, which must be one of `chars`."""
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self._buf, self._pos)
+        self._pos += 1
+        return ch
+
+    def value(self):
+        """Decodes the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue  # value is cut off at the end of the buffer
+                raise
+            # a number at the very end of the buffer may continue in the next chunk
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_deck_json(f):
+    """Yields ("name", str) and ("card", dict) items from a deck JSON file, one card at a time."""
+    parser = _StreamParser(f)
+    parser.expect("{")
+    if parser.peek() == "}":
+        return
+    while True:
+        key = parser.value()
+        parser.expect(":")
+        if key == "cards":
+            parser.expect("[")
+            if parser.peek() == "]":
+                parser.expect("]")
+            else:
+                while True:
+                    yield "card", parser.value()
+                    if parser.expect(",]") == "]":
+                        break
+        elif key == "name":
+            yield "name", parser.value()
+        else:
+            parser.value()  # unknown keys are skipped
+        if parser.expect(",}") == "}":
+            return
+
+
+def read_deck_json(f):
+    """Loads a deck from JSON, holding at most one chunk of the file in memory at a time."""
+    deck = Deck("")
+    seen = set()
+    for kind, item in iter_deck_json(f):
+        if kind == "card":
+            deck.add_card(Card.from_dict(item, seen))
+        else:
+            deck.name = item
+    return deck
+
+
+def write_deck_json(f, deck, indent=4):
+    """Writes a deck as JSON one card at a time.
+
+    The output matches json.dump(deck.to_dict(), f, indent=indent); pass
+    indent=None for the compact single-line form.
+    """
+    dumps = json.dumps
+    if indent is None:
+        head, tail, first_sep, sep = '{"name": ' + dumps(deck.name) + ', "cards": [', "]}", "", ", "
+        field_sep, open_card, close_card = ", ", "{", "}"
+    else:
+        pad = " " * indent
+        head = "{\n" + pad + '"name": ' + dumps(deck.name) + ",\n" + pad + '"cards": ['
+        tail = ("\n" + pad + "]\n}") if deck.cards else "]\n}"
+        first_sep, sep = "\n" + pad * 2, ",\n" + pad * 2
+        field_sep, open_card, close_card = ",\n" + pad * 3, "{\n" + pad * 3, "\n" + pad * 2 + "}"
+
+    f.write(head)
+    batch = []
+    for i, card in enumerate(deck.cards):
+        fields = field_sep.join(dumps(k) + ": " + dumps(v) for k, v in card.to_dict().items())
+        batch.append((sep if i else first_sep) + open_card + fields + close_card)
+        if len(batch) >= 256:
+            f.write("".join(batch))
+            batch.clear()
+    f.write("".join(batch) + tail)
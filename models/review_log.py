@@ -0,0 +1,106 @@
+import hashlib
+import os
+import struct
+import time
+
+RATINGS = ('got_it', 'aw_man', 'retry')
+
+# card id (8 raw bytes of the 16-hex-digit id), unix time, rating index, latency in ms
+_RECORD = struct.Struct("<8sdBI")
+
+
+def _id_bytes(card_id):
+    """Packs a card id into 8 bytes; ids that are not 16 hex digits are hashed."""
+    try:
+        if len(card_id) == 16:
+            return bytes.fromhex(card_id)
+    except ValueError:
+        pass
+    return hashlib.sha1(card_id.encode('utf-8')).digest()[:8]
+
+
+def empty_stats():
+    return {"reviews": 0, "got_it": 0, "aw_man": 0, "retry": 0, "avg_latency": 0.0, "cards": 0}
+
+
+class ReviewLog:
+    """Append-only log of study ratings for one deck, stored as fixed-size binary records.
+
+    Appending writes one 21-byte record. stats() aggregates with
+    struct.iter_unpack, and remembers how far it has read so repeated calls
+    only scan records appended since the last one.
+    """
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+        self._scanned = 0  # bytes already folded into the cached totals
+        self._totals = {"reviews": 0, "latency_ms": 0, "got_it": 0, "aw_man": 0, "retry": 0}
+        self._cards = set()
+
+    def append(self, card_id, rating, latency, timestamp=None):
+        """Records one rating; latency is in seconds."""
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            # drop a torn record left by an interrupted write so records stay aligned
+            size = self._file.seek(0, os.SEEK_END)
+            if size % _RECORD.size:
+                self._file.truncate(size - size % _RECORD.size)
+        timestamp = time.time() if timestamp is None else timestamp
+        latency_ms = max(0, min(int(latency * 1000), 0xFFFFFFFF))
+        self._file.write(_RECORD.pack(_id_bytes(card_id), timestamp, RATINGS.index(rating), latency_ms))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read(self, offset=0):
+        """Returns whole records from `offset` onwards as bytes."""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return b""
+        return data[:len(data) - len(data) % _RECORD.size]
+
+    def __iter__(self):
+        """Yields (card_id, timestamp, rating, latency_seconds) in the order they were logged."""
+        for card_id, timestamp, rating, latency_ms in _RECORD.iter_unpack(self._read()):
+            yield card_id.hex(), timestamp, RATINGS[rating], latency_ms / 1000
+
+    def stats(self, since=None):
+        """Returns review counts per rating, average latency (s) and distinct cards reviewed.
+
+        Without `since` the cached totals are extended with new records only;
+        with `since` (a unix time) the whole log is scanned.
+        """
+        if since is None:
+            data = self._read(self._scanned)
+            self._scanned += len(data)
+            totals, cards = self._totals, self._cards
+        else:
+            data = self._read()
+            totals = {"reviews": 0, "latency_ms": 0, "got_it": 0, "aw_man": 0, "retry": 0}
+            cards = set()
+
+        for card_id, timestamp, rating, latency_ms in _RECORD.iter_unpack(data):
+            if since is not None and timestamp < since:
+                continue
+            totals["reviews"] += 1
+            totals["latency_ms"] += latency_ms
+            totals[RATINGS[rating]] += 1
+            cards.add(card_id)
+
+        stats = empty_stats()
+        for rating in RATINGS:
+            stats[rating] = totals[rating]
+        stats["reviews"] = totals["reviews"]
+        stats["cards"] = len(cards)
+        if totals["reviews"]:
+            stats["avg_latency"] = totals["latency_ms"] / totals["reviews"] / 1000
+        return stats
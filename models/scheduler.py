@@ -0,0 +1,199 @@
+import heapq
+import random
+
+DAY = 24 * 60 * 60
+RELEARN_DELAY = 10 * 60  # a failed card is due again after ten minutes
+
+# ratings from the study screen mapped to SM-2 answer quality (0-5)
+RATING_QUALITY = {'got_it': 4, 'aw_man': 1, 'retry': 0}
+
+
+class Scheduler:
+    """SM-2 spaced-repetition state for the cards of one deck.
+
+    `states` maps a card id to [due, interval_days, ease, reps, lapses, index],
+    where index is the card's last known position in the deck, used to find
+    it again without scanning. `queue` is a heap of [due, id] kept across
+    sessions, so due cards are popped off it instead of sorted each time;
+    entries whose due no longer matches the card's state are stale and
+    skipped. `new` maps the ids of cards never reviewed to their last known
+    index, in deck order, or is None until it is seeded from the deck.
+    """
+    NEW_CARDS_PER_SESSION = 20
+    DUE_CARDS_PER_SESSION = 200
+
+    def __init__(self, states=None, queue=None, new=None):
+        self.states = states or {}
+        if queue is None:
+            queue = [[state[0], key] for key, state in self.states.items()]
+            heapq.heapify(queue)
+        self.queue = queue
+        self.new = new
+        self.stamp = None  # what the deck's storage looked like when this state was saved
+        self.updated = set()  # keys changed since loading
+        self.removed = set()  # keys dropped since loading
+        self.new_changed = False
+
+    @property
+    def changed(self):
+        return bool(self.updated or self.removed or self.new_changed)
+
+    def mark_saved(self):
+        self.updated.clear()
+        self.removed.clear()
+        self.new_changed = False
+
+    def seed_new(self, card_ids):
+        """Sets the new cards to every card id in `card_ids` (in deck order) that has no state."""
+        self.new = {key: index for index, key in enumerate(card_ids) if key not in self.states}
+        self.new_changed = True
+
+    def add_card(self, card_id, index):
+        """Records a card added to the deck at `index` as new."""
+        if self.new is not None and card_id not in self.states:
+            self.new[card_id] = index
+            self.new_changed = True
+
+    def remove_card(self, card_id):
+        """Forgets a card removed from the deck; its queue entry is skipped as stale."""
+        if self.new is not None and self.new.pop(card_id, None) is not None:
+            self.new_changed = True
+        if self.states.pop(card_id, None) is not None:
+            self.updated.discard(card_id)
+            self.removed.add(card_id)
+
+    def review(self, card, index, rating, now):
+        """Updates a card's schedule after it was rated in a study session."""
+        quality = RATING_QUALITY[rating]
+        key = card.id
+        due, interval, ease, reps, lapses, _ = self.states.get(key, [now, 0, 2.5, 0, 0, index])
+
+        if quality < 3:
+            if reps:
+                lapses += 1
+            reps = 0
+            interval = 0
+            due = now + RELEARN_DELAY
+        else:
+            reps += 1
+            if reps == 1:
+                interval = 1
+            elif reps == 2:
+                interval = 6
+            else:
+                interval = round(interval * ease)
+            due = now + interval * DAY
+        ease = max(1.3, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+        self.states[key] = [due, interval, round(ease, 3), reps, lapses, index]
+        self.updated.add(key)
+        if self.new is not None and self.new.pop(key, None) is not None:
+            self.new_changed = True
+        heapq.heappush(self.queue, [due, key])
+        if len(self.queue) > 2 * len(self.states) + 64:  # mostly stale entries; drop them
+            self.queue = [[state[0], key] for key, state in self.states.items()]
+            heapq.heapify(self.queue)
+
+    def _locate(self, deck, key, index):
+        """Returns the card's index in the deck, checking `index` first; None if it is gone."""
+        if 0 <= index < len(deck.cards) and deck.cards[index].id == key:
+            return index
+        return deck.index_of(key)
+
+    def due_cards(self, deck, now, due_limit=None, new_limit=None):
+        """Returns the deck indexes to study now: due cards first, then new ones.
+
+        Due cards are popped off the queue and pushed back afterwards, and new
+        cards are the first entries of `new`, so only the cards selected are
+        looked up in the deck.
+        """
+        due_limit = self.DUE_CARDS_PER_SESSION if due_limit is None else due_limit
+        new_limit = self.NEW_CARDS_PER_SESSION if new_limit is None else new_limit
+
+        selected = []
+        taken = []
+        seen = set()
+        while self.queue and self.queue[0][0] <= now and len(selected) < due_limit:
+            entry = heapq.heappop(self.queue)
+            due, key = entry
+            state = self.states.get(key)
+            if state is None or state[0] != due or key in seen:
+                continue  # stale: the card was removed or reviewed since this was pushed
+            seen.add(key)
+            index = self._locate(deck, key, state[5])
+            if index is None:
+                self.remove_card(key)  # card was deleted
+                continue
+            if index != state[5]:
+                state[5] = index
+                self.updated.add(key)
+            taken.append(entry)
+            selected.append(index)
+        for entry in taken:
+            heapq.heappush(self.queue, entry)
+
+        moved = {}
+        gone = []
+        for key, hint in (self.new or {}).items():
+            if len(moved) >= new_limit:
+                break
+            index = self._locate(deck, key, hint)
+            if index is None:
+                gone.append(key)
+                continue
+            moved[key] = index
+            selected.append(index)
+        for key, index in moved.items():
+            if self.new[key] != index:
+                self.new[key] = index
+                self.new_changed = True
+        for key in gone:
+            self.remove_card(key)
+            self.removed.add(key)
+        return selected
+
+
+class StudySession:
+    """Queue of deck indexes for one study session.
+
+    Cards come from `order` front to back; a card in `order` at position p has
+    priority p. Requeued cards go on a heap with a priority relative to the
+    card being shown, so requeueing is O(log n) instead of a list insert.
+    """
+    def __init__(self, order):
+        self._order = order
+        self._cursor = 0
+        self._heap = []  # (priority, seq, index)
+        self._seq = 0
+        self._now = -1.0
+        self._end = float(len(order))
+
+    def __len__(self):
+        return len(self._order) - self._cursor + len(self._heap)
+
+    def pop(self):
+        """Returns the next deck index to show."""
+        if self._heap and (self._cursor >= len(self._order) or self._heap[0][0] < self._cursor):
+            self._now, _, index = heapq.heappop(self._heap)
+        else:
+            index = self._order[self._cursor]
+            self._now = float(self._cursor)
+            self._cursor += 1
+        return index
+
+    def _push(self, priority, index):
+        self._seq += 1
+        heapq.heappush(self._heap, (priority, self._seq, index))
+
+    def requeue_front(self, index):
+        """Shows the card again next."""
+        self._push(self._now - 0.5, index)
+        self._now -= 0.5
+
+    def requeue_later(self, index):
+        """Shows the card again at a random later point, or at the end half of the time."""
+        if random.choice([True, False]):
+            self._push(random.uniform(self._now, self._end), index)
+        else:
+            self._end += 1
+            self._push(self._end, index)
@@ -0,0 +1,224 @@
+import re
+import sqlite3
+
+SEARCH_INDEX_FILENAME = ".search.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_decks (
+    deck TEXT PRIMARY KEY,
+    version TEXT
+);
+CREATE TABLE IF NOT EXISTS search_cards (
+    deck TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    front TEXT NOT NULL,
+    back TEXT NOT NULL,
+    PRIMARY KEY (deck, card_id)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS search_cards_by_doc ON search_cards(doc);
+CREATE TABLE IF NOT EXISTS search_terms (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+"""
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text):
+    """Returns the set of lower-cased words in a text."""
+    return set(_WORD.findall(text.lower()))
+
+
+def _sorted_pairs(postings):
+    """Yields (word, doc) pairs of a {word: [doc, ...]} map in index order."""
+    for word in sorted(postings):
+        for doc in sorted(postings[word]):
+            yield word, doc
+
+
+class SearchIndex:
+    """Inverted index of the words on every card of every deck, kept in SQLite.
+
+    search_terms holds one (word, card) row per distinct word of a card's
+    front and back, so a query only reads the rows of its own words.
+    search_decks records the version of each deck that was indexed (for
+    JSON decks, the file's content hash) so stale decks can be found
+    without reading them. Nothing is committed here; the owner commits.
+    """
+    POSTINGS_COUNT_CAP = 10000  # past this many rows a word is as poor a driver as any other
+
+    def __init__(self, conn):
+        self._conn = conn
+        conn.executescript(SCHEMA)
+
+    @classmethod
+    def open(cls, path, fsync=True):
+        """Opens the index stored in its own database file."""
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {'NORMAL' if fsync else 'OFF'}")
+        return cls(conn)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+    def versions(self):
+        """Returns {deck name: indexed version} for every indexed deck."""
+        return dict(self._conn.execute("SELECT deck, version FROM search_decks"))
+
+    def _add(self, deck_name, cards):
+        """Indexes new cards, inserting their words in sorted order so the B-tree fills sequentially."""
+        (doc,) = self._conn.execute("SELECT COALESCE(MAX(doc), 0) FROM search_cards").fetchone()
+        rows = []
+        postings = {}
+        for card in cards:
+            doc += 1
+            rows.append((deck_name, card.id, doc, card.front, card.back))
+            for word in words(card.front + "\n" + card.back):
+                postings.setdefault(word, []).append(doc)
+        self._conn.executemany("INSERT INTO search_cards VALUES (?, ?, ?, ?, ?)", rows)
+        self._conn.executemany("INSERT INTO search_terms VALUES (?, ?)", _sorted_pairs(postings))
+
+    def _delete(self, deck_name, entries):
+        """Drops (card id, doc, front, back) entries.
+
+        The words come from the stored text, so no doc -> term index is needed.
+        """
+        postings = {}
+        for _, doc, front, back in entries:
+            for word in words(front + "\n" + back):
+                postings.setdefault(word, []).append(doc)
+        self._conn.executemany(
+            "DELETE FROM search_terms WHERE term = ? AND doc = ?", _sorted_pairs(postings)
+        )
+        self._conn.executemany(
+            "DELETE FROM search_cards WHERE deck = ? AND card_id = ?",
+            ((deck_name, entry[0]) for entry in entries)
+        )
+
+    def _entry(self, deck_name, card_id):
+        return self._conn.execute(
+            "SELECT card_id, doc, front, back FROM search_cards WHERE deck = ? AND card_id = ?",
+            (deck_name, card_id)
+        ).fetchone()
+
+    def update_card(self, deck_name, card):
+        """Indexes a card that was added or edited."""
+        entry = self._entry(deck_name, card.id)
+        if entry:
+            if entry[2:] == (card.front, card.back):
+                return
+            self._delete(deck_name, [entry])
+        self._add(deck_name, [card])
+
+    def add_cards(self, deck_name, cards):
+        """Indexes cards that are new to the deck, e.g. imported ones."""
+        self._add(deck_name, cards)
+
+    def remove_card(self, deck_name, card_id):
+        entry = self._entry(deck_name, card_id)
+        if entry:
+            self._delete(deck_name, [entry])
+
+    def set_version(self, deck_name, version, previous):
+        """Records that a deck indexed at version `previous` was saved as `version`.
+
+        Card changes reach the index through update_card/remove_card, so
+        the entries still match. A deck indexed at another version (e.g.
+        changed outside the app) keeps it, so it is re-indexed on sync.
+        """
+        self._conn.execute(
+            "UPDATE search_decks SET version = ? WHERE deck = ? AND version IS ?",
+            (version, deck_name, previous)
+        )
+
+    def forget_version(self, deck_name):
+        """Marks a deck as not indexed, e.g. after one of its card updates failed, so sync re-indexes it."""
+        self._conn.execute("DELETE FROM search_decks WHERE deck = ?", (deck_name,))
+
+    def index_deck(self, deck_name, cards, version=None):
+        """Brings a deck's entries in line with `cards`, re-indexing only cards that changed."""
+        stored = {
+            entry[0]: entry for entry in self._conn.execute(
+                "SELECT card_id, doc, front, back FROM search_cards WHERE deck = ?", (deck_name,)
+            )
+        }
+        changed = []
+        indexed = set()
+        for card in cards:
+            if card.id in indexed:  # a hand-edited file may repeat an id; index the first
+                continue
+            indexed.add(card.id)
+            entry = stored.pop(card.id, None)
+            if entry is None or entry[2] != card.front or entry[3] != card.back:
+                if entry is not None:
+                    stored[card.id] = entry  # delete the old text before adding the new
+                changed.append(card)
+        self._delete(deck_name, list(stored.values()))
+        self._add(deck_name, changed)
+        self._conn.execute("INSERT OR REPLACE INTO search_decks VALUES (?, ?)", (deck_name, version))
+
+    def remove_deck(self, deck_name):
+        self._delete(deck_name, self._conn.execute(
+            "SELECT card_id, doc, front, back FROM search_cards WHERE deck = ?", (deck_name,)
+        ).fetchall())
+        self._conn.execute("DELETE FROM search_decks WHERE deck = ?", (deck_name,))
+
+    def rename_deck(self, old_name, new_name):
+        self._conn.execute("UPDATE search_cards SET deck = ? WHERE deck = ?", (new_name, old_name))
+        self._conn.execute("UPDATE search_decks SET deck = ? WHERE deck = ?", (new_name, old_name))
+
+    def _postings(self, word, cap):
+        """Returns how many index rows start with `word`, counting no further than `cap`."""
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM search_terms WHERE term >= ? AND term < ? LIMIT ?)",
+            (word, word + "\U0010ffff", cap)
+        ).fetchone()
+        return count
+
+    def search(self, query, limit=50, deck_name=None):
+        """Returns up to `limit` (deck, card id, front, back) for cards containing every query word.
+
+        Query words match as prefixes, so "photo" finds "photosynthesis".
+        Only the postings of the word with the fewest index rows are read
+        (each word's rows are counted up to POSTINGS_COUNT_CAP); the other
+        words are checked against each candidate's text, and reading stops
+        once `limit` cards matched.
+        """
+        query_words = sorted(words(query))
+        if not query_words:
+            return []
+        if len(query_words) > 1:
+            query_words.sort(key=lambda word: self._postings(word, self.POSTINGS_COUNT_CAP))
+        first, others = query_words[0], query_words[1:]
+        sql = (
+            "SELECT t.doc, c.deck, c.card_id, c.front, c.back FROM search_terms t "
+            "JOIN search_cards c ON c.doc = t.doc WHERE t.term >= ? AND t.term < ?"
+        )
+        params = [first, first + "\U0010ffff"]
+        if deck_name is not None:
+            sql += " AND c.deck = ?"
+            params.append(deck_name)
+        results = []
+        seen = set()
+        for doc, deck, card_id, front, back in self._conn.execute(sql, params):
+            if doc in seen:  # the card has several words starting with `first`
+                continue
+            seen.add(doc)
+            if others:
+                card_words = words(front + "\n" + back)
+                if not all(any(w.startswith(other) for w in card_words) for other in others):
+                    continue
+            results.append((deck, card_id, front, back))
+            if len(results) == limit:
+                break
+        return results
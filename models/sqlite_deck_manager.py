@@ -0,0 +1,412 @@
+import os
+import sqlite3
+import time
+from models.card import Card, legacy_card_id
+from models.deck import Deck
+from models.deck_manager import DATA_DIR, DeckManager
+from models.review_log import RATINGS, empty_stats
+from models.scheduler import Scheduler
+from models.search_index import SearchIndex
+from models.storage import StorageError
+
+DB_FILENAME = "flashcards.db"
+
+# cards of a deck that have no schedule row yet, in deck order
+NEW_CARDS_OF_DECK = """
+INSERT INTO new_cards
+SELECT deck_id, card_id, position FROM cards
+WHERE deck_id = ? AND card_id IS NOT NULL
+  AND card_id NOT IN (SELECT card_key FROM schedule WHERE deck_id = cards.deck_id)
+ORDER BY position
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY,
+    deck_id INTEGER NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    front TEXT NOT NULL,
+    back TEXT NOT NULL,
+    card_id TEXT
+);
+CREATE INDEX IF NOT EXISTS cards_by_deck ON cards(deck_id, position);
+CREATE TABLE IF NOT EXISTS schedule (
+    deck_id INTEGER NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+    card_key TEXT NOT NULL,
+    due REAL NOT NULL,
+    interval INTEGER NOT NULL,
+    ease REAL NOT NULL,
+    reps INTEGER NOT NULL,
+    lapses INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (deck_id, card_key)
+);
+CREATE INDEX IF NOT EXISTS schedule_by_due ON schedule(deck_id, due);
+CREATE TABLE IF NOT EXISTS new_cards (
+    deck_id INTEGER NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+    card_key TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS new_cards_by_deck ON new_cards(deck_id);
+CREATE INDEX IF NOT EXISTS new_cards_by_key ON new_cards(deck_id, card_key);
+CREATE TABLE IF NOT EXISTS reviews (
+    deck_id INTEGER NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+    card_key TEXT NOT NULL,
+    reviewed_at REAL NOT NULL,
+    rating TEXT NOT NULL,
+    latency_ms INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_by_deck ON reviews(deck_id, reviewed_at);
+"""
+
+
+class SQLiteReviewLog:
+    """Review log of one deck kept in the `reviews` table; same interface as ReviewLog."""
+    def __init__(self, manager, deck_name):
+        self._manager = manager
+        self._deck_name = deck_name
+
+    def append(self, card_id, rating, latency, timestamp=None):
+        if rating not in RATINGS:
+            raise ValueError(f"Unknown rating: {rating}")
+        conn = self._manager._conn
+        try:
+            conn.execute(
+                "INSERT INTO reviews SELECT id, ?, ?, ?, ? FROM decks WHERE name = ?",
+                (card_id, time.time() if timestamp is None else timestamp, rating,
+                 max(0, int(latency * 1000)), self._deck_name)
+            )
+            self._manager._commit()
+        except sqlite3.Error as e:
+            raise StorageError(f"Error saving review: {e}")
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        rows = self._manager._conn.execute(
+            "SELECT card_key, reviewed_at, rating, latency_ms FROM reviews "
+            "WHERE deck_id = (SELECT id FROM decks WHERE name = ?) ORDER BY rowid",
+            (self._deck_name,)
+        )
+        for key, timestamp, rating, latency_ms in rows:
+            yield key, timestamp, rating, latency_ms / 1000
+
+    def stats(self, since=None):
+        stats = empty_stats()
+        rows = self._manager._conn.execute(
+            "SELECT rating, COUNT(*), SUM(latency_ms) FROM reviews "
+            "WHERE deck_id = (SELECT id FROM decks WHERE name = ?) AND reviewed_at >= ? "
+            "GROUP BY rating",
+            (self._deck_name, since or 0)
+        ).fetchall()
+        latency_ms = 0
+        for rating, count, latency_sum in rows:
+            stats[rating] = count
+            stats["reviews"] += count
+            latency_ms += latency_sum
+        if stats["reviews"]:
+            stats["avg_latency"] = latency_ms / stats["reviews"] / 1000
+            (stats["cards"],) = self._manager._conn.execute(
+                "SELECT COUNT(DISTINCT card_key) FROM reviews "
+                "WHERE deck_id = (SELECT id FROM decks WHERE name = ?) AND reviewed_at >= ?",
+                (self._deck_name, since or 0)
+            ).fetchone()
+        return stats
+
+
+class SQLiteDeckManager(DeckManager):
+    """DeckManager that keeps every deck and card in one SQLite database.
+
+    Card rows keep a sparse `position` and the card's id, so single-card
+    adds, edits and deletes touch one row.
+    """
+    def __init__(self, fsync=True, deferred=False, db_path=None):
+        # in deferred mode changes stay in an open transaction until flush
+        super().__init__(fsync=fsync, deferred=deferred)
+        self._conn = sqlite3.connect(db_path or os.path.join(DATA_DIR, DB_FILENAME))
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(f"PRAGMA synchronous = {'FULL' if fsync else 'NORMAL'}")
+        had_new_cards = self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'new_cards'").fetchone()
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(cards)")]
+        if "card_id" not in columns:  # database created before cards had ids
+            self._conn.execute("ALTER TABLE cards ADD COLUMN card_id TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cards_by_id ON cards(deck_id, card_id)")
+        if not had_new_cards:  # database created before new cards were tracked
+            self._conn.executemany(NEW_CARDS_OF_DECK, self._conn.execute("SELECT id FROM decks").fetchall())
+        self._conn.commit()
+        # search tables live in the same database, so they change in the same transactions as the cards
+        self._search = SearchIndex(self._conn)
+
+    def _commit(self):
+        if not self.deferred:
+            self._conn.commit()
+        elif self._unsaved_since is None:
+            self._unsaved_since = time.monotonic()
+
+    def _commit_search(self):
+        self._commit()
+
+    def _rollback_search(self):
+        pass  # the transaction may hold deck changes; a partly synced deck is re-synced next time
+
+    def _search_version(self, deck_name):
+        """Every write updates the search tables with the cards, so only never-indexed decks are stale."""
+        return "sqlite"
+
+    def _deck_id(self, name):
+        row = self._conn.execute("SELECT id FROM decks WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _deck_exists(self, name):
+        return self._deck_id(name) is not None
+
+    def _load_deck(self, deck_name):
+        """Loads a deck, storing ids for rows written before cards had them."""
+        deck_id = self._deck_id(deck_name)
+        if deck_id is None:
+            return None
+        rows = self._conn.execute(
+            "SELECT id, card_id, front, back FROM cards WHERE deck_id = ? ORDER BY position",
+            (deck_id,)
+        ).fetchall()
+        seen = {card_id for _, card_id, _, _ in rows if card_id}
+        cards = []
+        missing = []
+        for row_id, card_id, front, back in rows:
+            if not card_id:
+                card_id = legacy_card_id(front, back, seen)
+                missing.append((card_id, row_id))
+            cards.append(Card(front, back, card_id))
+        if missing:
+            self._conn.executemany("UPDATE cards SET card_id = ? WHERE id = ?", missing)
+            self._conn.execute("DELETE FROM new_cards WHERE deck_id = ?", (deck_id,))
+            self._conn.execute(NEW_CARDS_OF_DECK, (deck_id,))
+            self._commit()
+        return Deck(deck_name, cards)
+
+    def _save_deck(self, deck, fmt=None):
+        """Rewrites all card rows of a deck, e.g. after it was reordered."""
+        name = self._sanitize_filename(deck.name)
+        try:
+            deck_id = self._deck_id(name)
+            if deck_id is None:
+                deck_id = self._conn.execute("INSERT INTO decks (name) VALUES (?)", (name,)).lastrowid
+            self._conn.execute("DELETE FROM cards WHERE deck_id = ?", (deck_id,))
+            self._conn.executemany(
+                "INSERT INTO cards (deck_id, position, front, back, card_id) VALUES (?, ?, ?, ?, ?)",
+                ((deck_id, position, card.front, card.back, card.id) for position, card in enumerate(deck.cards))
+            )
+            self._conn.execute("DELETE FROM new_cards WHERE deck_id = ?", (deck_id,))
+            self._conn.execute(NEW_CARDS_OF_DECK, (deck_id,))
+            self._unsaved.pop(name, None)
+            self._commit()
+        except sqlite3.Error as e:
+            raise StorageError(f"Error saving deck: {e}")
+
+    def flush(self):
+        """Writes queued decks and commits the open transaction."""
+        super().flush()
+        self._conn.commit()
+
+    def flush_if_idle(self):
+        """Commits once the oldest uncommitted change has waited DEFERRED_SAVE_SECONDS."""
+        if self._unsaved_since is not None and time.monotonic() - self._unsaved_since >= self.DEFERRED_SAVE_SECONDS:
+            self.flush()
+
+    def add_card(self, deck, card):
+        """Adds a card with a single INSERT."""
+        deck_id = self._deck_id(self._sanitize_filename(deck.name))
+        if deck_id is None:
+            deck.add_card(card)
+            self._save_deck(deck)
+            return
+        try:
+            self._conn.execute(
+                "INSERT INTO cards (deck_id, position, front, back, card_id) "
+                "VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM cards WHERE deck_id = ?), ?, ?, ?)",
+                (deck_id, deck_id, card.front, card.back, card.id)
+            )
+            self._conn.execute(
+                "INSERT INTO new_cards VALUES (?, ?, ?)", (deck_id, card.id, len(deck.cards))
+            )
+            self._search.update_card(self._sanitize_filename(deck.name), card)
+            self._commit()
+        except sqlite3.Error as e:
+            raise StorageError(f"Error saving deck: {e}")
+        deck.add_card(card)
+
+    def edit_card(self, deck, card_id, front=None, back=None):
+        """Edits a card with a single UPDATE."""
+        card = deck.get_card(card_id)
+        if card is None or (front is None and back is None):
+            return
+        deck.edit_card_by_id(card_id, front, back)
+        try:
+            self._conn.execute(
+                "UPDATE cards SET front = ?, back = ? "
+                "WHERE deck_id = (SELECT id FROM decks WHERE name = ?) AND card_id = ?",
+                (card.front, card.back, self._sanitize_filename(deck.name), card_id)
+            )
+            self._search.update_card(self._sanitize_filename(deck.name), card)
+            self._commit()
+        except sqlite3.Error as e:
+            raise StorageError(f"Error saving deck: {e}")
+
+    def remove_card(self, deck, card_id):
+        """Removes a card with a single DELETE; positions of other cards are untouched."""
+        if deck.index_of(card_id) is None:
+            return
+        try:
+            deck_id = self._deck_id(self._sanitize_filename(deck.name))
+            self._conn.execute("DELETE FROM cards WHERE deck_id = ? AND card_id = ?", (deck_id, card_id))
+            self._conn.execute("DELETE FROM schedule WHERE deck_id = ? AND card_key = ?", (deck_id, card_id))
+            self._conn.execute("DELETE FROM new_cards WHERE deck_id = ? AND card_key = ?", (deck_id, card_id))
+            self._search.remove_card(self._sanitize_filename(deck.name), card_id)
+            self._commit()
+        except sqlite3.Error as e:
+            raise StorageError(f"Error saving deck: {e}")
+        deck.remove_card_by_id(card_id)
+
+    def load_schedule(self, deck_name):
+        """Loads the spaced-repetition state of a deck's cards.
+
+        Rows come in due order, which is already a heap, and only the first
+        NEW_CARDS_PER_SESSION new cards are read.
+        """
+        deck_id = self._deck_id(deck_name)
+        rows = self._conn.execute(
+            "SELECT card_key, due, interval, ease, reps, lapses, position FROM schedule "
+            "WHERE deck_id = ? ORDER BY due",
+            (deck_id,)
+        ).fetchall()
+        new = self._conn.execute(
+            "SELECT card_key, position FROM new_cards WHERE deck_id = ? ORDER BY rowid LIMIT ?",
+            (deck_id, Scheduler.NEW_CARDS_PER_SESSION)
+        )
+        return Scheduler({row[0]: list(row[1:]) for row in rows}, [[row[1], row[0]] for row in rows], dict(new))
+
+    def save_schedule(self, deck_name, scheduler):
+        """Writes only the schedule rows that changed since loading."""
+        if not scheduler.changed:
+            return
+        deck_id = self._deck_id(deck_name)
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO schedule VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((deck_id, key, *scheduler.states[key]) for key in scheduler.updated)
+            )
+            self._conn.executemany(
+                "DELETE FROM schedule WHERE deck_id = ? AND card_key = ?",
+                ((deck_id, key) for key in scheduler.removed)
+            )
+            self._conn.executemany(
+                "DELETE FROM new_cards WHERE deck_id = ? AND card_key = ?",
+                ((deck_id, key) for key in scheduler.updated | scheduler.removed)
+            )
+            self._commit()
+        except sqlite3.Error as e:
+            raise StorageError(f"Error saving schedule: {e}")
+        scheduler.mark_saved()
+
+    def _loaded_schedule(self, deck_name):
+        return None  # new_cards is kept up to date by the card writes themselves
+
+    def review_log(self, deck_name):
+        """Returns the review log of a deck, stored in the `reviews` table."""
+        return SQLiteReviewLog(self, deck_name)
+
+    def compact(self, name=None):
+        """Reclaims free space in the database file (covers every deck)."""
+        self._conn.commit()
+        self._conn.execute("VACUUM")
+
+    def convert_deck(self, name, fmt):
+        raise ValueError("Deck formats do not apply to the SQLite backend")
+
+    def get_all_deck_names(self):
+        """Returns a list of all available deck names."""
+        return [row[0] for row in self._conn.execute("SELECT name FROM decks")]
+
+    def get_deck_info(self, name):
+        """Returns the card count of a deck, or None if it does not exist."""
+        deck_id = self._deck_id(name)
+        if deck_id is None:
+            return None
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cards WHERE deck_id = ?", (deck_id,)).fetchone()
+        return {"cards": count}
+
+    def delete_deck(self, name):
+        """Deletes a deck and its cards."""
+        try:
+            deleted = self._conn.execute("DELETE FROM decks WHERE name = ?", (name,)).rowcount
+            self._search.remove_deck(name)
+            self._commit()
+        except sqlite3.Error as e:
+            print(f"Error deleting deck: {e}")
+            return False
+        self.decks.pop(name, None)
+        self._unsaved.pop(name, None)
+        return bool(deleted)
+
+    def rename_deck(self, old_name, new_name):
+        """Renames a deck with a single UPDATE."""
+        if not new_name or len(new_name) > self.MAX_FILENAME_LENGTH:
+            raise ValueError(f"New deck name must be between 1 and {self.MAX_FILENAME_LENGTH} characters")
+
+        safe_new_name = self._sanitize_filename(new_name)
+        try:
+            renamed = self._conn.execute(
+                "UPDATE decks SET name = ? WHERE name = ?", (safe_new_name, old_name)
+            ).rowcount
+            if renamed:
+                self._search.rename_deck(old_name, safe_new_name)
+            self._commit()
+        except sqlite3.IntegrityError:
+            return False  # name already taken
+        except sqlite3.Error as e:
+            print(f"Error renaming deck: {e}")
+            return False
+        if not renamed:
+            return False
+        if old_name in self.decks:
+            self.decks[safe_new_name] = self.decks.pop(old_name)
+            self.decks[safe_new_name].name = safe_new_name
+        if old_name in self._unsaved:
+            self._unsaved[safe_new_name] = self._unsaved.pop(old_name)
+        return True
+
+    def import_json_decks(self, json_manager=None):
+        """Copies every JSON/binary deck in DATA_DIR into the database.
+
+        Decks that already exist in the database are skipped. Returns the
+        names of the imported decks.
+        """
+        json_manager = json_manager or DeckManager()
+        imported = []
+        for name in sorted(json_manager.get_all_deck_names()):
+            if self._deck_exists(name):
+                continue
+            deck = json_manager.get_deck(name)
+            if deck is None:
+                continue
+            self._save_deck(Deck(name, deck.cards))
+            deck_id = self._deck_id(name)
+            self._conn.executemany(
+                "INSERT INTO reviews VALUES (?, ?, ?, ?, ?)",
+                ((deck_id, key, timestamp, rating, round(latency * 1000))
+                 for key, timestamp, rating, latency in json_manager.review_log(name))
+            )
+            imported.append(name)
+        self._conn.commit()
+        return imported
+
+    def close(self):
+        self.flush()
+        self._conn.close()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+class StorageError(Exception):
+    """A deck, schedule or review could not be written."""
+
+
+@contextmanager
+def atomic_open(path, mode='w', fsync=True):
+    """Opens a temp file next to `path` and renames it into place on success.
+
+    Readers see either the old file or the complete new one, never a
+    partial write. With fsync, the data and the rename are flushed to disk
+    before returning; without it a power loss may still lose the latest
+    save, but never corrupts the previous one.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            os.chmod(tmp_path, _file_mode(path))
+            yield f
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        fsync_dir(directory)
+
+
+def _file_mode(path):
+    """Keeps an existing file's permissions, else uses the default for new files."""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def fsync_dir(directory):
+    """Flushes directory entries (renames, creates) where the OS supports it."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows, where directories cannot be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -1,11 +1,21 @@
+import collections
 import curses
 import textwrap
+import time
+
+KEY_BATCH_SECONDS = 0.05  # longest run of waiting keys handled before the screen is redrawn
+IDLE_SECONDS = 1.0  # how often on_idle runs while waiting for a key
 
 class BaseUI:
     """Base class for UI components with common functionality."""
+    # keys read from the terminal ahead of time, e.g. typed right after a
+    # paste; shared by every UI on the screen and read before the terminal
+    pending_keys = collections.deque()
+
     def __init__(self, stdscr):
         """Initialize the base UI with standard screen object."""
         self.stdscr = stdscr
+        self.on_idle = None  # called every IDLE_SECONDS while keys() waits, e.g. to write deferred saves
         self._init_colors()
 
     def _init_colors(self):
@@ -66,6 +76,45 @@ class BaseUI:
 
         self.stdscr.attroff(border_color)
 
+    def getch(self, window=None):
+        """Reads one key, taking pending_keys first."""
+        if self.pending_keys:
+            return self.pending_keys.popleft()
+        return (window or self.stdscr).getch()
+
+    def keys(self, window=None):
+        """Waits for a key, then also yields every key already waiting after it.
+
+        Loops handle all of them and redraw once, so held or auto-repeated
+        keys do not queue up behind a redraw each. A key is only read once
+        the previous one was handled, so handlers that read keys themselves
+        (e.g. "gg", with getch) still get them in order. A steady stream of
+        keys still lets the screen redraw every KEY_BATCH_SECONDS. While no
+        key comes, on_idle (if set) runs every IDLE_SECONDS.
+        """
+        window = window or self.stdscr
+        if self.on_idle is None or self.pending_keys:
+            key = self.getch(window)
+        else:
+            window.timeout(int(IDLE_SECONDS * 1000))
+            try:
+                key = window.getch()
+                while key == -1:
+                    self.on_idle()
+                    key = window.getch()
+            finally:
+                window.timeout(-1)
+        deadline = time.monotonic() + KEY_BATCH_SECONDS
+        while key != -1:
+            yield key
+            if time.monotonic() > deadline:
+                return
+            window.nodelay(True)
+            try:
+                key = self.getch(window)
+            finally:
+                window.nodelay(False)
+
     def display_message(self, msg, row=None, pause=False):
         """Display a message on the screen."""
         self.stdscr.erase()
@@ -95,5 +144,5 @@ class BaseUI:
         self.stdscr.refresh()
         
         if pause:
-            while self.stdscr.getch() not in [ord(' '), curses.KEY_ENTER, 10]:
+            while self.getch() not in [ord(' '), curses.KEY_ENTER, 10]:
                 pass
\ No newline at end of file
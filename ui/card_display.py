@@ -1,9 +1,28 @@
 import curses
-import textwrap
-from collections import deque
 import random
+import textwrap
 import time
+from functools import lru_cache
 from .base import BaseUI
+from models.scheduler import StudySession
+
+
+@lru_cache(maxsize=256)
+def wrap_lines(text, width):
+    """Returns the display lines of a card face wrapped to `width`.
+
+    Cached on (text, width): scrolling, requeued cards and the front shown
+    again above the back reuse the result. Clear it when the terminal is
+    resized.
+    """
+    wrapped_lines = []
+    for line in text.splitlines():
+        if line.strip():
+            wrapped = textwrap.wrap(line, width=width)
+            wrapped_lines.extend(wrapped if wrapped else [''])
+        else:
+            wrapped_lines.append('')
+    return tuple(wrapped_lines)
 
 class CardDisplay(BaseUI):
     """Handles card display and study functionality."""
@@ -15,100 +34,117 @@ class CardDisplay(BaseUI):
         self.current_mode = "standard"
         self.front_scroll_offset = 0  # for front card content
         self.back_scroll_offset = 0   # for back card content
-    def _draw_text_in_box(self, r, c, h, w, text, color=None, scroll_offset=0):
-        """Draw wrapped text within a specified box with proper scrolling."""
+        self._reset_frame()
+
+    def _reset_frame(self):
+        """Forgets what is on screen so the next _show_card repaints everything."""
+        self._frame = {}  # region -> state it was last drawn with
+        self._faces = {}  # "front"/"back" -> subwindow for the text inside the box
+
+    def _changed(self, region, state):
+        """Records the state a region is drawn with; returns False if it is already on screen."""
+        if region in self._frame and self._frame[region] == state:
+            return False
+        self._frame[region] = state
+        return True
+
+    def _draw_text_in_box(self, win, text, color=None, scroll_offset=0):
+        """Draw wrapped text into a box's text subwindow with proper scrolling."""
         color = color or self.color_default
-        
+        win.erase()
+
         if not text:
             return 0
-            
 
-        wrapped_lines = []
-        for line in text.splitlines():
-            # ensure minimum wrap width
-            wrap_width = max(1, w - 4)  # -4 for padding
-            if line.strip():  
-                wrapped = textwrap.wrap(line, width=wrap_width)
-                wrapped_lines.extend(wrapped if wrapped else [''])
-            else:
-                wrapped_lines.append('') 
+        available_lines, width = win.getmaxyx()
+        wrapped_lines = wrap_lines(text, width)
 
         total_lines = len(wrapped_lines)
-        available_lines = h - 2  
-        
         max_scroll = max(0, total_lines - available_lines)
         scroll_offset = max(0, min(scroll_offset, max_scroll))
-        
-        start_index = scroll_offset
-        end_index = min(total_lines, start_index + available_lines)
-        
-        for i, line in enumerate(wrapped_lines[start_index:end_index]):
-            display_row = r + 1 + i
-            # check if we're still within the box
-            if display_row < r + h - 1:
-                try:
-                  
-                    display_line = line[:w-4]
-                    self.stdscr.addstr(display_row, c + 2, display_line, color)
-                    
-               
-                    remaining_width = w - 4 - len(display_line)
-                    if remaining_width > 0:
-                        self.stdscr.addstr(display_row, c + 2 + len(display_line), ' ' * remaining_width, color)
-                except curses.error:
-                    pass  
-        for i in range(end_index - start_index, available_lines):
-            display_row = r + 1 + i
-            if display_row < r + h - 1:
-                try:
-                    self.stdscr.addstr(display_row, c + 2, ' ' * (w-4), color)
-                except curses.error:
-                    pass
 
-        return total_lines  
+        for i, line in enumerate(wrapped_lines[scroll_offset:scroll_offset + available_lines]):
+            try:
+                win.addstr(i, 0, line[:width], color)
+            except curses.error:
+                pass  # writing the bottom-right cell moves the cursor off the window
+
+        return total_lines
+
+    def _draw_face(self, face, text, scroll_offset):
+        """Redraws the text of one card face if the text or its scroll position changed."""
+        win = self._faces.get(face)
+        if win is None:
+            return 0
+        state = (text, scroll_offset)
+        if self._changed(face, state):
+            self._frame[face + "_lines"] = self._draw_text_in_box(win, text, scroll_offset=scroll_offset)
+            win.noutrefresh()
+        return self._frame[face + "_lines"]
+
     def _show_card(self, card, current, total, deck_name, show_back=False, rating=None):
+        """Draws the study screen, repainting only the regions whose content changed.
+
+        The first call after a resize or a front/back switch clears the screen
+        and lays out the boxes; later calls compare each region (title,
+        progress, timer, border colour, the text of each face and its scroll
+        offset) with what was last drawn. Returns the wrapped line count of the
+        face being scrolled.
+        """
         rows, cols = self.stdscr.getmaxyx()
         card_width = min(cols - 6, 100)
         card_height = min(rows - 8, 18)
         start_row = (rows - card_height) // 2
         start_col = (cols - card_width) // 2
+        box_height = card_height if not show_back else (card_height - 1) // 2
+        boxes = [("front", "Front", start_row)]
+        if show_back:
+            boxes.append(("back", "Back", start_row + box_height + 1))
 
-        self.stdscr.erase()
+        if self._changed("layout", (rows, cols, show_back)):
+            self._frame = {"layout": self._frame["layout"]}
+            self._faces = {}
+            self.stdscr.erase()
+            for face, _, box_row in boxes:
+                try:
+                    win = self._faces[face] = self.stdscr.derwin(box_height - 2, card_width - 4, box_row + 1, start_col + 2)
+                    win.leaveok(True)  # the cursor is hidden; don't move it for every face update
+                except curses.error:
+                    pass  # terminal too small for the box
+            if rows - 2 > 0:
+                text = "Press <Space> or <Enter> to show back | Scroll: j/k" if not show_back else "(1) I got it! (2) Aw man... (3) Retry | Front: ↑/↓, Back: j/k"
+                self.stdscr.addstr(rows - 2, max(0, (cols - len(text)) // 2), text, curses.A_ITALIC | self.color_default)
+            self.stdscr.addstr(3, 2, "Progress: ")
 
         title_text = f"Deck: {deck_name} ({current}/{total})"
-        self.stdscr.addstr(1, max(0, (cols - len(title_text)) // 2), title_text, curses.A_BOLD | self.color_default)
+        if self._changed("title", title_text):
+            self.stdscr.move(1, 0)
+            self.stdscr.clrtoeol()
+            self.stdscr.addstr(1, max(0, (cols - len(title_text)) // 2), title_text, curses.A_BOLD | self.color_default)
 
-        progress = f"Progress: "
-        self.stdscr.addstr(3, 2, progress)
         progress_bar = "=" * int((current/total) * 20)
-        self.stdscr.addstr(3, len(progress) + 2, f"[{progress_bar:<20}]")
+        if self._changed("progress", progress_bar):
+            self.stdscr.addstr(3, len("Progress: ") + 2, f"[{progress_bar:<20}]")
 
         if self.current_mode == "timed" and self.study_start_time:
             elapsed = int(time.time() - self.study_start_time)
             timer_text = f"Time: {elapsed//60}m {elapsed%60}s"
-            self.stdscr.addstr(3, cols - len(timer_text) - 2, timer_text)
+            if self._changed("timer", timer_text):
+                self.stdscr.addstr(3, cols - 16, f"{timer_text:>14}")
 
         border_color = self.color_default
         if show_back and rating:
             border_color = {'got_it': self.color_correct, 'aw_man': self.color_incorrect, 'retry': self.color_progress}.get(rating, self.color_default)
+        if self._changed("border", border_color):
+            for _, title, box_row in boxes:
+                self._draw_box(box_row, start_col, box_height, card_width, title, border_color)
 
-        box_height = card_height if not show_back else (card_height - 1) // 2
-
-        if not show_back:
-            self._draw_box(start_row, start_col, box_height, card_width, "Front", border_color)
-            total_lines = self._draw_text_in_box(start_row, start_col, box_height, card_width, card.front, scroll_offset=self.front_scroll_offset)
-        else:
-            self._draw_box(start_row, start_col, box_height, card_width, "Front", border_color)
-            front_total = self._draw_text_in_box(start_row, start_col, box_height, card_width, card.front, scroll_offset=self.front_scroll_offset)
-
-            back_start_row = start_row + box_height + 1
-            self._draw_box(back_start_row, start_col, box_height, card_width, "Back", border_color)
-            back_total = self._draw_text_in_box(back_start_row, start_col, box_height, card_width, card.back, scroll_offset=self.back_scroll_offset)
-            total_lines = back_total
-
-        if rows - 2 > 0:
-            text = "Press <Space> or <Enter> to show back | Scroll: j/k" if not show_back else "(1) I got it! (2) Aw man... (3) Retry | Front: ↑/↓, Back: j/k"
-            self.stdscr.addstr(rows - 2, max(0, (cols - len(text)) // 2), text, curses.A_ITALIC | self.color_default)
+        # stdscr goes first so the face subwindows are copied over it
+        self.stdscr.noutrefresh()
+        total_lines = self._draw_face("front", card.front, self.front_scroll_offset)
+        if show_back:
+            total_lines = self._draw_face("back", card.back, self.back_scroll_offset)
+        curses.doupdate()
 
         return total_lines
     
@@ -120,6 +156,7 @@ class CardDisplay(BaseUI):
         choice = self.input_handler.show_menu(
             f"Study: {deck.name}",
             [
+                ("d", "Review Due Cards"),
                 ("s", "Shuffle Deck"),
                 ("t", "Timed Challenge (5min)"),
                 ("c", "Continue Without Shuffling"),
@@ -127,24 +164,42 @@ class CardDisplay(BaseUI):
             ]
         )
 
-        if choice == 'b':
+        if choice == 'b' or not choice:
             return
 
-        if choice == "s":
-            deck.shuffle()
-            self.deck_manager._save_deck(deck)
+        self.current_mode = "standard"
+        scheduler = self.deck_manager.load_schedule(deck.name)
+        order = range(len(deck.cards))
+        if choice == "d":
+            order = scheduler.due_cards(deck, time.time())
+            if not order:
+                self.display_message("No cards are due. Come back later!", pause=True)
+                return
+        elif choice == "s":
+            # shuffle this session's order only; the deck and its file keep their order
+            order = random.sample(range(len(deck.cards)), len(deck.cards))
             self.display_message("Deck shuffled!", pause=False)
         elif choice == "t":
             self.current_mode = "timed"
             self.study_start_time = time.time()
 
-        study_queue = deque(deck.cards)
-        
+        review_log = self.deck_manager.review_log(deck.name)
+        try:
+            self._study_session(deck, StudySession(order), scheduler, review_log)
+        finally:
+            review_log.close()
+            self.deck_manager.save_schedule(deck.name, scheduler)
+
+    def _study_session(self, deck, study_queue, scheduler, review_log):
+        session_total = len(study_queue)
+        self._reset_frame()  # the screen was used by the menu
+
         while study_queue:
             self.front_scroll_offset = 0
             self.back_scroll_offset = 0
-            current_card_index = len(deck.cards) - len(study_queue)
-            card = study_queue.popleft()
+            current_card_index = session_total - len(study_queue)
+            card_index = study_queue.pop()
+            card = deck.cards[card_index]
 
             if self.current_mode == "timed":
                 elapsed = int(time.time() - self.study_start_time)
@@ -152,79 +207,86 @@ class CardDisplay(BaseUI):
                     self.display_message("Time's up! Study session complete.", pause=True)
                     break
 
-            total_front_lines = self._show_card(card, current_card_index + 1, len(deck.cards), deck.name)
+            total_front_lines = self._show_card(card, current_card_index + 1, session_total, deck.name)
+            shown_at = time.monotonic()  # latency runs from showing the front to the rating
             show_back_mode = False
             
             while not show_back_mode:
-                key = self.stdscr.getch()
-                
-                if key in [ord(' '), curses.KEY_ENTER, 10]:
-                    show_back_mode = True
-                elif key == curses.KEY_UP:
-                    if self.front_scroll_offset > 0:
-                        self.front_scroll_offset -= 1
-                elif key == curses.KEY_DOWN:
-                    if self.front_scroll_offset < total_front_lines - 5:
-                        self.front_scroll_offset += 1
-                
-                total_front_lines = self._show_card(card, current_card_index + 1, len(deck.cards), deck.name)
+                for key in self.keys():  # every waiting key, then one redraw
+                    if key in [ord(' '), curses.KEY_ENTER, 10]:
+                        show_back_mode = True
+                        break  # keys after it are for the back
+                    elif key == curses.KEY_RESIZE:
+                        wrap_lines.cache_clear()  # old widths will not come back
+                    elif key == curses.KEY_UP:
+                        if self.front_scroll_offset > 0:
+                            self.front_scroll_offset -= 1
+                    elif key == curses.KEY_DOWN:
+                        if self.front_scroll_offset < total_front_lines - 5:
+                            self.front_scroll_offset += 1
+
+                if not show_back_mode:
+                    total_front_lines = self._show_card(card, current_card_index + 1, session_total, deck.name)
 
             total_back_lines = self._show_card(
                 card,
                 current_card_index + 1,
-                len(deck.cards),
+                session_total,
                 deck.name,
                 show_back=True
             )
 
             rating_selected = False
             while not rating_selected:
-                key = self.stdscr.getch()
-                rating = {
-                    ord('1'): 'got_it',
-                    ord('2'): 'aw_man',
-                    ord('3'): 'retry'
-                }.get(key)
-
-                if rating:
-                    if rating == 'aw_man':
-                        if random.choice([True, False]):
-                            study_queue.insert(random.randint(0, len(study_queue)), card)
-                        else:
-                            study_queue.append(card)
-                    elif rating == 'retry':
-                        study_queue.appendleft(card)
+                for key in self.keys():  # every waiting key, then one redraw
+                    rating = {
+                        ord('1'): 'got_it',
+                        ord('2'): 'aw_man',
+                        ord('3'): 'retry'
+                    }.get(key)
+
+                    if rating:
+                        review_log.append(card.id, rating, time.monotonic() - shown_at)
+                        scheduler.review(card, card_index, rating, time.time())
+                        if rating == 'aw_man':
+                            study_queue.requeue_later(card_index)
+                        elif rating == 'retry':
+                            study_queue.requeue_front(card_index)
+                        # colour the border with the rating; nothing else on screen changes
+                        self._show_card(
+                            card,
+                            current_card_index + 1,
+                            session_total,
+                            deck.name,
+                            show_back=True,
+                            rating=rating
+                        )
+                        rating_selected = True
+                        break  # keys after it are for the next card
+                    elif key == curses.KEY_RESIZE:
+                        wrap_lines.cache_clear()
+                    elif key == curses.KEY_UP:
+                        if self.front_scroll_offset > 0:
+                            self.front_scroll_offset -= 1
+                    elif key == curses.KEY_DOWN:
+                        if self.front_scroll_offset < total_front_lines - 5:
+                            self.front_scroll_offset += 1
+                    elif key in [ord('j'), ord('J')]:
+                        if self.back_scroll_offset < total_back_lines - 5:
+                            self.back_scroll_offset += 1
+                    elif key in [ord('k'), ord('K')]:
+                        if self.back_scroll_offset > 0:
+                            self.back_scroll_offset -= 1
 
+                # once rated, the next card replaces this one straight away
+                if not rating_selected:
                     self._show_card(
                         card,
-                        len(deck.cards) - len(study_queue),
-                        len(deck.cards),
+                        session_total - len(study_queue),
+                        session_total,
                         deck.name,
-                        show_back=True,
-                        rating=rating
+                        show_back=True
                     )
-                    rating_selected = True
-                elif key == curses.KEY_UP:
-                    if self.front_scroll_offset > 0:
-                        self.front_scroll_offset -= 1
-                elif key == curses.KEY_DOWN:
-                    if self.front_scroll_offset < total_front_lines - 5:
-                        self.front_scroll_offset += 1
-                elif key in [ord('j'), ord('J')]:
-                    if self.back_scroll_offset < total_back_lines - 5:
-                        self.back_scroll_offset += 1
-                elif key in [ord('k'), ord('K')]:
-                    if self.back_scroll_offset > 0:
-                        self.back_scroll_offset -= 1
-                    
-                self._show_card(
-                    card,
-                    len(deck.cards) - len(study_queue),
-                    len(deck.cards),
-                    deck.name,
-                    show_back=True,
-                    rating=rating
-                )
 
         if self.current_mode == "timed":
             elapsed = int(time.time() - self.study_start_time)
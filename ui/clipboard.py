@@ -0,0 +1,207 @@
+import base64
+import collections
+import os
+import select
+import shutil
+import subprocess
+import sys
+
+PASTE_TIMEOUT = 2.0  # seconds to wait for a clipboard command or the terminal
+PASTE_START = "[200~"  # what follows ESC at the start of a bracketed paste
+PASTE_END = b"\x1b[201~"
+
+# drop control characters other than newline and tab from pasted text
+_CONTROL_CHARS = dict.fromkeys([c for c in range(32) if c not in (9, 10)] + [127])
+
+
+def clean_paste(text):
+    """Normalizes pasted text: \\n newlines, tabs as spaces and no other control characters."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").translate(_CONTROL_CHARS)
+    if "\t" in text:
+        text = text.expandtabs(4)
+    return text
+
+
+def set_bracketed_paste(enabled):
+    """Asks the terminal to mark pasted text with ESC[200~ ... ESC[201~, or to stop."""
+    if os.name != 'nt' and sys.stdout.isatty():
+        sys.stdout.write("\x1b[?2004h" if enabled else "\x1b[?2004l")
+        sys.stdout.flush()
+
+
+def read_bracketed_paste(window, pending, timeout=PASTE_TIMEOUT):
+    """Reads a bracketed paste after getch returned ESC; returns its text.
+
+    `pending` is the deque of keys read from the terminal ahead of time;
+    keys are taken from it before the terminal. If the ESC did not start a
+    paste, the keys read after it are put back into it and None is
+    returned. curses reads the terminal a byte at a time, so once the start
+    marker is consumed the pasted text is read straight from stdin in large
+    chunks; keys that arrived after the end marker go into `pending`. A
+    paste that stalls for `timeout` seconds ends with what arrived.
+    """
+    read = []
+    window.timeout(10)
+    try:
+        for expected in PASTE_START:
+            key = pending.popleft() if pending else window.getch()
+            if key != -1:
+                read.append(key)
+            if key != ord(expected):
+                pending.extendleft(reversed(read))
+                return None
+    finally:
+        window.timeout(-1)
+    data = bytearray()
+    while pending and 0 <= pending[0] < 256:  # e.g. a second paste read with the end of the first
+        data.append(pending.popleft())
+    end = data.find(PASTE_END)
+    fd = sys.stdin.fileno()
+    while end == -1 and select.select([fd], [], [], timeout)[0]:
+        chunk = os.read(fd, 1 << 16)
+        if not chunk:
+            break
+        data += chunk
+        end = data.find(PASTE_END, max(0, len(data) - len(chunk) - len(PASTE_END)))
+    if end != -1:
+        pending.extendleft(reversed(data[end + len(PASTE_END):]))
+        del data[end:]
+    return clean_paste(data.decode('utf-8', errors='replace'))
+
+
+class CommandClipboard:
+    """Reads the system clipboard by running a command such as xclip or pbpaste."""
+    def __init__(self, name, command, timeout=PASTE_TIMEOUT):
+        self.name = name
+        self.command = command
+        self.timeout = timeout
+
+    def available(self):
+        return shutil.which(self.command[0]) is not None
+
+    def paste(self):
+        """Returns the clipboard text, or None if the command failed or timed out."""
+        try:
+            result = subprocess.run(
+                self.command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=self.timeout
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode('utf-8', errors='replace')
+
+
+class OSC52Clipboard:
+    """Asks the terminal for its clipboard with an OSC 52 query.
+
+    Works over SSH and without a display server, in terminals that allow
+    reading the clipboard (e.g. xterm with allowWindowOps, kitty, foot).
+    The reply arrives as input, so it is read from `window` with getch.
+    Keys typed before the reply starts are added to `pending`, the deque of
+    keys read ahead of time, after the keys already in it.
+    """
+    name = "osc52"
+    REPLY_START = [0x1b, ord(']')]
+
+    def __init__(self, window, pending=None, timeout=PASTE_TIMEOUT):
+        self.window = window
+        self.pending = pending if pending is not None else collections.deque()
+        self.timeout = timeout
+
+    def available(self):
+        return os.name != 'nt' and sys.stdout.isatty()
+
+    def _keep_typed(self, read):
+        """Queues the keys in `read` that came before the reply."""
+        for start in range(len(read) - 1):
+            if read[start:start + 2] == self.REPLY_START:
+                break
+        else:
+            start = len(read)
+        self.pending.extend(read[:start])
+        return read[start:]
+
+    def paste(self):
+        """Returns the clipboard text, or None if the terminal did not answer in time."""
+        sys.stdout.write("\x1b]52;c;?\x07")
+        sys.stdout.flush()
+        read = []
+        self.window.timeout(int(self.timeout * 1000))
+        try:
+            while True:
+                key = self.window.getch()
+                if key == -1:
+                    self._keep_typed(read)
+                    return None  # no answer, or it stopped half way
+                if key == 7 or (key == ord('\\') and read[-1:] == [0x1b]):  # BEL or ESC \ ends it
+                    break
+                read.append(key)
+        finally:
+            self.window.timeout(-1)
+        reply = "".join(chr(key) for key in self._keep_typed(read) if 0 <= key < 256).rstrip('\x1b')
+        _, _, data = reply.rpartition(';')
+        try:
+            return base64.b64decode(data).decode('utf-8', errors='replace')
+        except ValueError:
+            return None
+
+
+class FakeClipboard:
+    """Clipboard holding a fixed text, for tests and for FLASH_CLIPBOARD=fake."""
+    name = "fake"
+
+    def __init__(self, text=""):
+        self.text = text
+
+    def available(self):
+        return True
+
+    def paste(self):
+        return self.text
+
+
+def clipboard_providers(window=None, pending=None):
+    """Returns every known provider, in the order they are tried."""
+    return [
+        CommandClipboard("wl-paste", ["wl-paste", "--no-newline"]),
+        CommandClipboard("xclip", ["xclip", "-selection", "clipboard", "-o"]),
+        CommandClipboard("pbpaste", ["pbpaste"]),
+        CommandClipboard("powershell", ["powershell", "-NoProfile", "-Command", "Get-Clipboard -Raw"]),
+        OSC52Clipboard(window, pending),
+        FakeClipboard(os.environ.get("FLASH_CLIPBOARD_TEXT", "")),
+    ]
+
+
+def detect_clipboard(window=None, pending=None):
+    """Returns the clipboard provider to use, or None if there is none.
+
+    FLASH_CLIPBOARD names one explicitly (wl-paste, xclip, pbpaste,
+    powershell, osc52 or fake). Otherwise wl-paste is used under Wayland,
+    xclip under X11, pbpaste on macOS, PowerShell on Windows, and the
+    terminal (OSC 52) when none of those apply, e.g. over SSH.
+    """
+    providers = {provider.name: provider for provider in clipboard_providers(window, pending)}
+    name = os.environ.get("FLASH_CLIPBOARD")
+    if name:
+        return providers.get(name)
+    if os.environ.get("WAYLAND_DISPLAY"):
+        candidates = ["wl-paste", "xclip"]
+    elif os.environ.get("DISPLAY"):
+        candidates = ["xclip"]
+    elif sys.platform == "darwin":
+        candidates = ["pbpaste"]
+    elif os.name == 'nt':
+        candidates = ["powershell"]
+    else:
+        candidates = []
+    if window is not None:
+        candidates.append("osc52")
+    for candidate in candidates:
+        if providers[candidate].available():
+            return providers[candidate]
+    return None
@@ -1,10 +1,13 @@
 import curses
+import os
 from .base import BaseUI
 from .card_display import CardDisplay
+from .menu import NumberedOptions
 from models.card import Card
 
 class DeckActions(BaseUI):
     """Handles deck-related actions and menus."""
+    SEARCH_RESULTS = 200  # most matches listed by the card search
     def __init__(self, stdscr, deck_manager, input_handler):
         super().__init__(stdscr)
         self.deck_manager = deck_manager
@@ -69,6 +72,33 @@ class DeckActions(BaseUI):
             except ValueError:
                 self.display_message("Invalid selection.", pause=True)
 
+    def search_cards_menu(self):
+        """Search the cards of every deck and open the deck of the chosen card."""
+        query = self.input_handler.get_multiline_input("Search cards in all decks:")
+        if not query:
+            self.display_message("Cancelled.", pause=True)
+            return
+
+        results = self.deck_manager.search(query, limit=self.SEARCH_RESULTS)
+        if not results:
+            self.display_message(f"No cards match '{query}'.", pause=True)
+            return
+
+        options = NumberedOptions(
+            len(results),
+            lambda i: f"{results[i][0]}: " + results[i][2][:40].replace('\n', ' '),
+            extra=[("0", "Back")],
+            width=60,
+            search=lambda i: results[i][2] + "\n" + results[i][3]
+        )
+        choice = self.input_handler.show_menu(f"Search: {query}"[:40], options)
+        if choice and choice != '0':
+            deck = self.deck_manager.get_deck(results[int(choice) - 1][0])
+            if deck is None:
+                self.display_message("Deck not found.", pause=True)
+                return
+            self.deck_actions_menu(deck)
+
     def deck_actions_menu(self, deck):
         """Display the actions available for a selected deck."""
         while True:
@@ -78,28 +108,31 @@ class DeckActions(BaseUI):
                     ("1", "Add Card"),
                     ("2", "Edit Card"),
                     ("3", "Delete Card"),
-                    ("4", "Study Deck"),
-                    ("5", "Rename Deck"),
-                    ("6", "Delete Deck"),
-                    ("7", "Back")
+                    ("4", "Import Cards"),
+                    ("5", "Study Deck"),
+                    ("6", "Rename Deck"),
+                    ("7", "Delete Deck"),
+                    ("8", "Back")
                 ]
             )
 
-            if not choice or choice == '7':
+            if not choice or choice == '8':
+                self.deck_manager.flush()
                 break
 
             actions = {
                 '1': self.add_card_menu,
                 '2': self.edit_card_menu,
                 '3': self.delete_card_menu,
-                '4': self.card_display.study_deck,
-                '5': self.rename_deck_menu,
-                '6': self.delete_deck_confirmation
+                '4': self.import_cards_menu,
+                '5': self.card_display.study_deck,
+                '6': self.rename_deck_menu,
+                '7': self.delete_deck_confirmation
             }
 
             action = actions.get(choice)
             if action:
-                if choice == '6':
+                if choice == '7':
                     if action(deck):  # if deck was successfully deleted
                         break  # go back to the main menu
                 else:
@@ -111,45 +144,65 @@ class DeckActions(BaseUI):
         if front_text:
             back_text = self.input_handler.get_multiline_input("Enter card back:")
             if back_text:
-                deck.add_card(Card(front_text, back_text))
                 try:
-                    self.deck_manager._save_deck(deck)
+                    self.deck_manager.add_card(deck, Card(front_text, back_text))
                     self.display_message("Card added!", pause=True)
                 except Exception as e:
                     self.display_message(f"Error saving deck: {e}", pause=True)
 
+    def import_cards_menu(self, deck):
+        """Handle bulk-importing cards from a CSV/TSV/Anki text file."""
+        path = self.input_handler.get_multiline_input("Path of CSV, TSV or Anki text file:")
+        if not path:
+            self.display_message("Import cancelled.", pause=True)
+            return
+
+        path = os.path.expanduser(path.strip())
+        self.display_message("Importing cards...", pause=False)
+        try:
+            added, skipped = self.deck_manager.import_cards(deck, path)
+            self.display_message(f"Imported {added} card(s), skipped {skipped} duplicate(s).", pause=True)
+        except OSError as e:
+            self.display_message(f"Could not read file: {e}", pause=True)
+        except Exception as e:
+            self.display_message(f"Error importing cards: {e}", pause=True)
+
+    def _card_options(self, deck):
+        """Menu options for picking a card, formatted only when they scroll into view.
+
+        Typing "/" in the menu filters them by front and back text.
+        """
+        return NumberedOptions(
+            len(deck.cards),
+            lambda i: "Front: " + deck.cards[i].front[:40].replace('\n', ' ') + "...",
+            extra=[("0", "Cancel")],
+            width=50,
+            search=lambda i: deck.cards[i].front + "\n" + deck.cards[i].back
+        )
+
     def edit_card_menu(self, deck):
         """Handle the process of editing an existing card in the deck."""
         if not deck.cards:
             self.display_message("No cards in this deck.", pause=True)
             return
 
-        options = [
-            (str(i + 1), "Front: " + c.front[:40].replace('\n', ' ') + "...")
-
-            for i, c in enumerate(deck.cards)
-        ] + [("0", "Cancel")]
-
-        choice = self.input_handler.show_menu("Edit Card", options)
+        choice = self.input_handler.show_menu("Edit Card", self._card_options(deck))
         if choice and choice != '0':
             try:
-                card_to_edit = deck.cards[int(choice) - 1]
+                card_index = int(choice) - 1
+                card_to_edit = deck.cards[card_index]
                 
                 new_front = self.input_handler.get_multiline_input(
                     f"Current front:\n{card_to_edit.front}\nNew front (empty to keep):",
                     card_to_edit.front
                 )
-                if new_front is not None:
-                    card_to_edit.front = new_front
 
                 new_back = self.input_handler.get_multiline_input(
                     f"Current back:\n{card_to_edit.back}\nNew back (empty to keep):",
                     card_to_edit.back
                 )
-                if new_back is not None:
-                    card_to_edit.back = new_back
 
-                self.deck_manager._save_deck(deck)
+                self.deck_manager.edit_card(deck, card_to_edit.id, front=new_front, back=new_back)
                 self.display_message("Card updated.", pause=True)
             except ValueError:
                 self.display_message("Invalid selection.", pause=True)
@@ -160,16 +213,10 @@ class DeckActions(BaseUI):
             self.display_message("No cards in this deck.", pause=True)
             return
 
-        options = [
-            (str(i + 1), "Front: " + c.front[:40].replace('\n', ' ') + "...")
-            for i, c in enumerate(deck.cards)
-        ] + [("0", "Cancel")]
-
-        choice = self.input_handler.show_menu("Delete Card", options)
+        choice = self.input_handler.show_menu("Delete Card", self._card_options(deck))
         if choice and choice != '0':
             try:
-                deck.remove_card(int(choice) - 1)
-                self.deck_manager._save_deck(deck)
+                self.deck_manager.remove_card(deck, deck.cards[int(choice) - 1].id)
                 self.display_message("Card deleted.", pause=True)
             except ValueError:
                 self.display_message("Invalid selection.", pause=True)
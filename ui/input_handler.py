@@ -3,13 +3,12 @@ import curses.ascii
 import curses.textpad
 import textwrap
 from .base import BaseUI
+from .menu import Menu
 
 class SimpleInputHandler(BaseUI):
     """Handles user input functionality."""
     def __init__(self, stdscr):
         super().__init__(stdscr)
-        self._selected_index = 0
-        self._top_index = 0
         self._edit_win = None
         curses.curs_set(0)  # hide cursor by default
 
@@ -95,74 +94,32 @@ class SimpleInputHandler(BaseUI):
 
     def show_menu(self, title, options):
         """Display a menu and handle user selection.
-        Now supports both navigation and direct key selection."""
-        curses.curs_set(0)  # ensure cursor is hidden for menu
-        self.stdscr.erase()
-        rows, cols = self.stdscr.getmaxyx()
-        max_visible_options = rows - 6
-        menu_width = min(cols - 4, max(len(text) for _, text in options) + 12)
-
-        if self._top_index > 0:
-            self._selected_index = self._top_index = 0
+        Now supports both navigation and direct key selection.
 
-        # create a mapping of option keys to their indices
-        key_map = {key.lower(): i for i, (key, _) in enumerate(options)}
+        `options` is a list of (key, text) pairs or a lazy sequence such as
+        menu.NumberedOptions; only the rows on screen are formatted. Numbers
+        with several digits can be typed; "/" filters the options."""
+        curses.curs_set(0)  # ensure cursor is hidden for menu
+        menu = Menu(options)
 
         while True:
-            self.stdscr.erase()
-            menu_height = min(len(options) + 4, max_visible_options + 4)
-            menu_row = max(0, (rows - menu_height) // 2)
-            menu_col = max(0, (cols - menu_width) // 2)
-
-            self._draw_box(menu_row, menu_col, menu_height, menu_width, title)
-
-            for i, (key, text) in enumerate(options):
-                if self._top_index <= i < self._top_index + max_visible_options:
-                    item_text = f" {key}. {text} "
-                    item_col = menu_col + (menu_width - len(item_text)) // 2
-
-                    if i == self._selected_index:
-                        self.stdscr.attron(self.color_highlight | curses.A_BOLD)
-                        self.stdscr.addstr(menu_row + (i - self._top_index) + 2, item_col, item_text)
-                        self.stdscr.attroff(self.color_highlight | curses.A_BOLD)
-                    else:
-                        self.stdscr.addstr(menu_row + (i - self._top_index) + 2, item_col, item_text)
-
-            nav_help_text = "Navigate: j/k or ↑/↓, Select: Enter/letter key, Back: h"
-            self.stdscr.addstr(
-                rows - 2,
-                max(0, (cols - len(nav_help_text)) // 2),
-                nav_help_text,
-                curses.A_ITALIC | self.color_default
-            )
-
-            self.stdscr.refresh()
-            key = self.stdscr.getch()
-
-            # check for direct key selection
-            pressed_char = chr(key).lower() if 32 <= key <= 126 else None
-            if pressed_char in key_map:
-                self._selected_index = self._top_index = 0
-                return options[key_map[pressed_char]][0]
-
-            # handle other navigation keys
-            if key in [ord('j'), curses.KEY_DOWN]:
-                self._selected_index = min(self._selected_index + 1, len(options) - 1)
-                if self._selected_index >= self._top_index + max_visible_options:
-                    self._top_index = min(
-                        self._selected_index - max_visible_options + 1,
-                        len(options) - max_visible_options
-                    )
-            elif key in [ord('k'), curses.KEY_UP]:
-                self._selected_index = max(self._selected_index - 1, 0)
-                if self._selected_index < self._top_index:
-                    self._top_index = max(0, self._selected_index)
-            elif key in [curses.KEY_ENTER, 10, ord(' ')]:
-                selected_option = options[self._selected_index][0]
-                self._selected_index = self._top_index = 0
-                return selected_option
-            elif key == ord('h'):
-                self._selected_index = self._top_index = 0
-                return None
-            elif key == 3:  # CTRL+C
-                raise KeyboardInterrupt
\ No newline at end of file
+            menu.draw(self, title, "Navigate: j/k or ↑/↓, Select: Enter/letter key, Filter: /, Back: h")
+            for key in self.keys():  # every waiting key, then one redraw
+                # option keys, multi-digit numbers and the "/" filter
+                action = menu.handle_key(key)
+                if action == Menu.SELECT:
+                    return menu.key()
+                if action == Menu.HANDLED:
+                    continue
+
+                # handle other navigation keys
+                if key in [ord('j'), curses.KEY_DOWN]:
+                    menu.move(1)
+                elif key in [ord('k'), curses.KEY_UP]:
+                    menu.move(-1)
+                elif key in [curses.KEY_ENTER, 10, ord(' ')]:
+                    return menu.key()
+                elif key == ord('h'):
+                    return None
+                elif key == 3:  # CTRL+C
+                    raise KeyboardInterrupt
@@ -5,33 +5,52 @@ from models.deck_manager import DeckManager
 
 class TUI(BaseUI):
     """Main TUI class orchestrating the flashcard application."""
-    def __init__(self, stdscr, input_handler):
+    def __init__(self, stdscr, input_handler, deck_manager=None):
         super().__init__(stdscr)
-        self.deck_manager = DeckManager()
+        self.deck_manager = deck_manager or DeckManager()
         self.input_handler = input_handler
         self.deck_actions = DeckActions(stdscr, self.deck_manager, input_handler)
+        # deferred saves are written while the menus, editor or study screen wait for keys
+        input_handler.on_idle = self._save_if_idle
+        self.deck_actions.card_display.on_idle = self._save_if_idle
+
+    def _save_if_idle(self):
+        """Writes deferred saves once they are DEFERRED_SAVE_SECONDS old.
+
+        A failed save is tried again on the next call and reported by the
+        flush on exit, so it does not interrupt the screen being used.
+        """
+        try:
+            self.deck_manager.flush_if_idle()
+        except Exception:
+            pass
 
     def run(self):
-        while True:
-            try:
-                choice = self.input_handler.show_menu(
-                    "flash",
-                    [
-                        ("1", "Create Deck"),
-                        ("2", "Select Deck"),
-                        ("3", "Exit")
-                    ]
-                )
-                if choice == '3':
+        try:
+            while True:
+                try:
+                    choice = self.input_handler.show_menu(
+                        "flash",
+                        [
+                            ("1", "Create Deck"),
+                            ("2", "Select Deck"),
+                            ("3", "Search Cards"),
+                            ("4", "Exit")
+                        ]
+                    )
+                    if choice == '4':
+                        break
+                    self._run_action(choice)
+                except KeyboardInterrupt:
                     break
-                self._run_action(choice)
-            except KeyboardInterrupt:
-                break
+        finally:
+            self.deck_manager.flush()  # write any deferred saves before exiting
 
     def _run_action(self, choice):
         actions = {
             '1': self.deck_actions.create_deck_menu,
             '2': self.deck_actions.select_deck_menu,
+            '3': self.deck_actions.search_cards_menu,
         }
         if choice in actions:
             actions[choice]()
\ No newline at end of file
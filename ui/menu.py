@@ -0,0 +1,237 @@
+import curses
+
+
+class NumberedOptions:
+    """Menu options keyed "1".."count" whose text is only built when drawn.
+
+    `label(i)` returns the text of option i (0-based) and `search(i)` the
+    text the menu filter matches it against (the label by default).
+    `extra` options such as ("0", "Cancel") follow the numbered ones.
+    `width` is the longest text label() returns, so the menu can size
+    itself without formatting every option.
+    """
+    def __init__(self, count, label, extra=(), width=40, search=None):
+        self.count = count
+        self._label = label
+        self._search = search or label
+        self.extra = list(extra)
+        self.width = max([width] + [len(text) for _, text in self.extra])
+
+    def __len__(self):
+        return self.count + len(self.extra)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if index < self.count:
+            return str(index + 1), self._label(index)
+        return self.extra[index - self.count]
+
+    def search_text(self, index):
+        if index < self.count:
+            return self._search(index)
+        return self.extra[index - self.count][1]
+
+    def find(self, key):
+        """Returns the index of the option with this key, or None."""
+        for i, (extra_key, _) in enumerate(self.extra):
+            if extra_key.lower() == key:
+                return self.count + i
+        if key.isdigit() and key[0] != "0" and int(key) <= self.count:
+            return int(key) - 1
+        return None
+
+    def has_longer_key(self, prefix):
+        """Tells whether some key is `prefix` followed by more characters."""
+        if any(key.lower().startswith(prefix) and key.lower() != prefix for key, _ in self.extra):
+            return True
+        return prefix.isdigit() and prefix[0] != "0" and int(prefix) * 10 <= self.count
+
+
+class Menu:
+    """Scrolling list of (key, text) options that only formats and draws the visible rows.
+
+    `options` is a list of pairs or a lazy sequence like NumberedOptions,
+    so moving and redrawing cost O(visible rows) however many options
+    there are. `rows` maps screen positions to option indexes: all of them,
+    or the matches of the filter typed after "/".
+    """
+    HANDLED = "handled"
+    SELECT = "select"
+
+    def __init__(self, options):
+        self.options = options
+        self.rows = range(len(options))
+        self.selected = 0  # position in self.rows
+        self.top = 0
+        self.visible = 1  # rows available for options, set by draw()
+        self.query = None  # filter text while filtering, else None
+        self._digits = ""  # number typed so far, for keys longer than one digit
+        self._search_index = None
+        if hasattr(options, "find"):
+            self._find = options.find
+            self._has_longer_key = options.has_longer_key
+            self.width = options.width
+        else:
+            keys = {key.lower(): i for i, (key, _) in enumerate(options)}
+            self._find = keys.get
+            self._has_longer_key = lambda prefix: any(
+                key.startswith(prefix) and key != prefix for key in keys
+            )
+            self.width = max(len(text) for _, text in options)
+
+    def find(self, key):
+        """Returns the index of the option with this key (case-insensitive), or None."""
+        return self._find(key.lower())
+
+    def key(self, index=None):
+        """Returns the key of an option, by default the selected one."""
+        return self.options[self.rows[self.selected] if index is None else index][0]
+
+    def move_to(self, position):
+        """Selects a row and scrolls just enough to keep it on screen."""
+        self.selected = max(0, min(position, len(self.rows) - 1))
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + self.visible:
+            self.top = self.selected - self.visible + 1
+
+    def move(self, delta):
+        self.move_to(self.selected + delta)
+
+    def _search_texts(self):
+        """Lower-cased search text of every option, built once per menu on the first filter."""
+        if self._search_index is None:
+            search_text = getattr(self.options, "search_text", None)
+            if search_text is None:
+                self._search_index = [text.lower() for _, text in self.options]
+            else:
+                self._search_index = [search_text(i).lower() for i in range(len(self.options))]
+        return self._search_index
+
+    def set_filter(self, query):
+        """Shows only options containing every word of `query`; None shows all of them.
+
+        While the query only grows, the previous matches are narrowed by the
+        words that changed instead of searching every option again.
+        """
+        current = self.rows[self.selected] if self.rows else None
+        if query is None:
+            self.rows = range(len(self.options))
+        else:
+            texts = self._search_texts()
+            terms = query.lower().split()
+            rows = range(len(self.options))
+            if self.query is not None and query.startswith(self.query):
+                # earlier words are unchanged and the old last word is a prefix of its new version
+                rows = self.rows
+                terms = terms[max(0, len(self.query.split()) - 1):]
+            for term in terms:
+                rows = [i for i in rows if term in texts[i]]
+            self.rows = rows
+        self.query = query
+        self.top = 0
+        self.selected = 0
+        if query is None and current is not None:
+            self.move_to(current)  # keep the option picked while filtering selected
+
+    def handle_key(self, key):
+        """Handles the keys all menus share: option keys, multi-digit numbers and "/" filtering.
+
+        Returns SELECT when the selected option was chosen, HANDLED when the
+        key was used otherwise, or None to leave it to the caller.
+        """
+        if self.query is not None:
+            return self._handle_filter_key(key)
+
+        pressed_char = chr(key).lower() if 32 <= key <= 126 else None
+        if pressed_char is None:
+            self._digits = ""
+            return None
+
+        if pressed_char.isdigit():
+            number = self._digits + pressed_char
+            index = self.find(number)
+            if index is None and self._digits:
+                number = pressed_char  # start a new number
+                index = self.find(number)
+            if index is not None:
+                self._digits = number
+                self.move_to(self.rows.index(index))
+                # wait for more digits while a longer key could still be meant, e.g. "1" of "12"
+                if not self._has_longer_key(number):
+                    return self.SELECT
+                return self.HANDLED
+        self._digits = ""
+
+        index = self.find(pressed_char)
+        if index is not None:
+            self.move_to(self.rows.index(index))
+            return self.SELECT
+        if pressed_char == "/":
+            self.set_filter("")
+            return self.HANDLED
+        return None
+
+    def _handle_filter_key(self, key):
+        if key in [curses.KEY_ENTER, 10]:
+            return self.SELECT if self.rows else self.HANDLED
+        if key == 27:  # ESC leaves the filter
+            self.set_filter(None)
+        elif key in [curses.KEY_BACKSPACE, 127, 8]:
+            self.set_filter(self.query[:-1])
+        elif key == curses.KEY_DOWN:
+            self.move(1)
+        elif key == curses.KEY_UP:
+            self.move(-1)
+        elif 32 <= key <= 126:
+            self.set_filter(self.query + chr(key))
+        else:
+            return None
+        return self.HANDLED
+
+    def draw(self, ui, title, help_text):
+        """Draws the menu box, the visible options and a help or filter line on ui.stdscr."""
+        stdscr = ui.stdscr
+        stdscr.erase()
+        rows, cols = stdscr.getmaxyx()
+        self.visible = max(1, rows - 6)
+        self.move_to(self.selected)  # the window may have shrunk
+
+        menu_width = min(cols - 4, self.width + 12)
+        menu_height = min(max(len(self.rows), 1) + 4, self.visible + 4)
+        menu_row = max(0, (rows - menu_height) // 2)
+        menu_col = max(0, (cols - menu_width) // 2)
+
+        ui._draw_box(menu_row, menu_col, menu_height, menu_width, title)
+
+        for position in range(self.top, min(len(self.rows), self.top + self.visible)):
+            key, text = self.options[self.rows[position]]
+            item_text = f" {key}. {text} "[:max(0, menu_width - 2)]
+            item_col = menu_col + (menu_width - len(item_text)) // 2
+            attr = ui.color_highlight | curses.A_BOLD if position == self.selected else curses.A_NORMAL
+            try:
+                stdscr.addstr(menu_row + (position - self.top) + 2, item_col, item_text, attr)
+            except curses.error:
+                pass  # terminal too small
+        if not self.rows:
+            try:
+                stdscr.addstr(menu_row + 2, menu_col + 2, "No matches"[:max(0, menu_width - 4)], curses.A_DIM)
+            except curses.error:
+                pass
+
+        if self.query is not None:
+            help_text = f"/{self.query}  ({len(self.rows)} match{'es' if len(self.rows) != 1 else ''}, Esc: clear)"
+        try:
+            stdscr.addstr(
+                rows - 2,
+                max(0, (cols - len(help_text)) // 2),
+                help_text[:max(0, cols - 1)],
+                curses.A_ITALIC | ui.color_default
+            )
+        except curses.error:
+            pass
+
+        stdscr.refresh()
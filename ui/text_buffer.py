@@ -0,0 +1,270 @@
+class UndoHistory:
+    """Undo/redo log of the edits made to a TextBuffer.
+
+    Edits are kept as (kind, line, column, text) spans: "insert" of text
+    starting at the position, or "delete" of text that started there. Its
+    inverse is the other kind, so nothing is copied but the changed text.
+    The edits of one command (or one insert-mode session) form a group
+    that u/Ctrl-R undo and redo at once. Consecutive typed characters and
+    backspaces are merged into spans of up to MERGE_CHARS characters, so
+    merging never copies more than that per key. History is linear: an
+    edit after an undo drops the redo groups. Once the spans hold more
+    than MAX_CHARS characters the oldest groups are forgotten.
+    """
+    MAX_CHARS = 1_000_000
+    MERGE_CHARS = 256
+
+    def __init__(self):
+        self._undo = []  # groups: [cursor before, cursor after, [spans]]
+        self._redo = []
+        self._open = None  # group receiving edits, until close()
+        self._cursor = (0, 0)
+        self._chars = 0
+
+    def mark(self, cursor):
+        """Notes the cursor before a command, restored if the command's edits are undone."""
+        if self._open is None:
+            self._cursor = cursor
+
+    def record(self, kind, y, x, text):
+        if self._open is None:
+            self._open = [self._cursor, None, []]
+            self._undo.append(self._open)
+            for group in self._redo:
+                self._chars -= sum(len(span[3]) for span in group[2])
+            self._redo.clear()
+        spans = self._open[2]
+        last = spans[-1] if spans else None
+        if (last and last[0] == kind and last[1] == y and len(last[3]) < self.MERGE_CHARS
+                and "\n" not in text and "\n" not in last[3]):
+            if kind == "insert" and last[2] + len(last[3]) == x:  # typing on
+                spans[-1] = (kind, y, last[2], last[3] + text)
+                text = None
+            elif kind == "delete" and x + len(text) == last[2]:  # backspace
+                spans[-1] = (kind, y, x, text + last[3])
+                text = None
+            elif kind == "delete" and x == last[2]:  # deleting forward
+                spans[-1] = (kind, y, x, last[3] + text)
+                text = None
+        if text is not None:
+            spans.append((kind, y, x, text))
+        self._chars += len(spans[-1][3]) - (len(last[3]) if text is None else 0)
+        while self._chars > self.MAX_CHARS and len(self._undo) > 1:
+            self._chars -= sum(len(span[3]) for span in self._undo.pop(0)[2])
+
+    def close(self, cursor):
+        """Ends the open group; the next edit starts a new one."""
+        if self._open is not None:
+            self._open[1] = cursor
+            self._open = None
+
+    def undo(self, buffer):
+        """Reverts the last group; returns the cursor to restore, or None if there is nothing to undo."""
+        self._open = None
+        if not self._undo:
+            return None
+        group = self._undo.pop()
+        for kind, y, x, text in reversed(group[2]):
+            if kind == "insert":
+                buffer._delete_text(y, x, text)
+            else:
+                buffer._insert(y, x, text)
+        self._redo.append(group)
+        return group[0]
+
+    def redo(self, buffer):
+        """Re-applies the last undone group; returns the cursor after it, or None."""
+        self._open = None
+        if not self._redo:
+            return None
+        group = self._redo.pop()
+        for kind, y, x, text in group[2]:
+            if kind == "insert":
+                buffer._insert(y, x, text)
+            else:
+                buffer._delete_text(y, x, text)
+        self._undo.append(group)
+        return group[1] or group[0]
+
+
+class TextBuffer:
+    """Lines of text for the editor, with a gap buffer on the line being edited.
+
+    The line under edit is split into the characters before the gap and
+    the characters after it (stored reversed), so typing, backspace and
+    deleting at the cursor only touch the ends of two lists instead of
+    rebuilding the line string. Moving the gap costs the distance moved;
+    other lines stay plain strings in a list. Positions are (line, column).
+    Every edit is reported to `history` (an UndoHistory), if given.
+    """
+    def __init__(self, text=None, history=None):
+        self.history = history
+        self._lines = text.splitlines() if text else [""]
+        if not self._lines:
+            self._lines = [""]
+        self._gap_y = None  # line held in _before/_after; its entry in _lines is stale
+        self._before = []
+        self._after = []  # reversed, so the character right after the gap is last
+
+    def __len__(self):
+        return len(self._lines)
+
+    def _flush(self):
+        """Writes the gap line back into _lines as a string."""
+        if self._gap_y is not None:
+            self._lines[self._gap_y] = "".join(self._before) + "".join(reversed(self._after))
+            self._gap_y = None
+            self._before = []
+            self._after = []
+
+    def _move_gap(self, y, x):
+        if self._gap_y != y:
+            self._flush()
+            line = self._lines[y]
+            self._before = list(line[:x])
+            self._after = list(line[:x - 1:-1]) if x else list(reversed(line))
+            self._gap_y = y
+            return
+        before, after = self._before, self._after
+        if x < len(before):
+            moved = before[x:]
+            del before[x:]
+            after.extend(reversed(moved))
+        elif x > len(before):
+            count = min(x - len(before), len(after))
+            moved = after[-count:]
+            del after[-count:]
+            before.extend(reversed(moved))
+
+    def line(self, y):
+        """Returns line y as a string."""
+        if y == self._gap_y:
+            return "".join(self._before) + "".join(reversed(self._after))
+        return self._lines[y]
+
+    def line_length(self, y):
+        if y == self._gap_y:
+            return len(self._before) + len(self._after)
+        return len(self._lines[y])
+
+    def line_slice(self, y, start, end):
+        """Returns line y[start:end] without building the whole line."""
+        if y != self._gap_y:
+            return self._lines[y][start:end]
+        before, after = self._before, self._after
+        end = min(end, len(before) + len(after))
+        if start >= end:
+            return ""
+        left = "".join(before[start:end]) if start < len(before) else ""
+        if end <= len(before):
+            return left
+        # columns past the gap; after[-1] is the column right after it
+        low = max(start, len(before)) - len(before)
+        high = end - len(before)
+        return left + "".join(reversed(after[len(after) - high:len(after) - low]))
+
+    def lines(self):
+        """Returns a list of every line."""
+        self._flush()
+        return list(self._lines)
+
+    def text(self):
+        self._flush()
+        return "\n".join(self._lines)
+
+    def _record(self, kind, y, x, text):
+        if self.history is not None and text:
+            self.history.record(kind, y, x, text)
+
+    def insert(self, y, x, text):
+        """Inserts text (which may contain newlines) at (y, x); returns the position after it."""
+        self._record("insert", y, x, text)
+        return self._insert(y, x, text)
+
+    def _insert(self, y, x, text):
+        if "\n" not in text:
+            self._move_gap(y, x)
+            self._before.extend(text)
+            return y, x + len(text)
+        self._flush()
+        line = self._lines[y]
+        parts = text.split("\n")
+        last = parts[-1]
+        parts[0] = line[:x] + parts[0]
+        parts[-1] = last + line[x:]
+        self._lines[y:y + 1] = parts
+        return y + len(parts) - 1, len(last)
+
+    def _delete_text(self, y, x, text):
+        """Removes `text`, which starts at (y, x) and may span lines."""
+        if "\n" not in text:
+            self._move_gap(y, x)
+            del self._after[len(self._after) - len(text):]
+            return
+        self._flush()
+        parts = text.split("\n")
+        end_y = y + len(parts) - 1
+        self._lines[y:end_y + 1] = [self._lines[y][:x] + self._lines[end_y][len(parts[-1]):]]
+
+    def delete(self, y, x, count):
+        """Deletes up to `count` characters of line y from column x; returns them."""
+        self._move_gap(y, x)
+        count = min(count, len(self._after))
+        if count <= 0:
+            return ""
+        removed = self._after[-count:]
+        del self._after[-count:]
+        removed = "".join(reversed(removed))
+        self._record("delete", y, x, removed)
+        return removed
+
+    def set_line(self, y, text):
+        self._record("delete", y, 0, self.line(y))
+        self._record("insert", y, 0, text)
+        if y == self._gap_y:
+            self._gap_y = None
+            self._before = []
+            self._after = []
+        self._lines[y] = text
+
+    def split_line(self, y, x):
+        """Breaks line y at column x; the gap moves to the start of the new line."""
+        self._record("insert", y, x, "\n")
+        self._move_gap(y, x)
+        self._lines[y] = "".join(self._before)
+        self._lines.insert(y + 1, "")  # stale while it holds the gap
+        self._before = []
+        self._gap_y = y + 1
+
+    def join_lines(self, y):
+        """Appends line y + 1 to line y; returns the old length of line y."""
+        self._flush()
+        length = len(self._lines[y])
+        self._record("delete", y, length, "\n")
+        self._lines[y] += self._lines.pop(y + 1)
+        return length
+
+    def insert_lines(self, y, lines):
+        """Inserts whole lines before line y."""
+        self._flush()
+        if y < len(self._lines):
+            self._record("insert", y, 0, "\n".join(lines) + "\n")
+        else:
+            self._record("insert", y - 1, len(self._lines[y - 1]), "\n" + "\n".join(lines))
+        self._lines[y:y] = lines
+
+    def delete_lines(self, y, count=1):
+        """Deletes whole lines from line y, keeping at least one line; returns them."""
+        self._flush()
+        removed = self._lines[y:y + count]
+        text = "\n".join(removed)
+        if y + len(removed) < len(self._lines):
+            self._record("delete", y, 0, text + "\n")
+        elif y > 0:
+            self._record("delete", y - 1, len(self._lines[y - 1]), "\n" + text)
+        else:
+            self._record("delete", 0, 0, text)  # the buffer keeps one empty line
+        del self._lines[y:y + count]
+        if not self._lines:
+            self._lines.append("")
+        return removed
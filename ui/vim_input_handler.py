@@ -3,20 +3,27 @@ import curses.ascii
 import textwrap
 import platform
 from .base import BaseUI
+from .clipboard import clean_paste, detect_clipboard, read_bracketed_paste, set_bracketed_paste
+from .menu import Menu
+from .text_buffer import TextBuffer, UndoHistory
 
 class VimInputHandler(BaseUI):
     """Handles user input functionality with Vim-like multiline input and scrolling."""
     def __init__(self, stdscr):
         super().__init__(stdscr)
-        self._selected_index = 0
-        self._top_index = 0
         self._edit_win = None
         self._cursor_y = 0
         self._cursor_x = 0
-        self._scroll_offset = 0  # track scroll position
-        self._text_lines = [""]
+        self._scroll_offset = 0  # first line on screen
+        self._scroll_row = 0  # first wrapped row of that line on screen
+        self._wrap_width = 1  # columns per screen row; long lines wrap onto more rows
+        self._screen = []  # what each text row shows, so draws skip unchanged rows
+        self._mode_shown = None
+        self._history = UndoHistory()
+        self._buffer = TextBuffer(history=self._history)
         self._insert_mode = False
         self._paste_buffer = []  # internal paste buffer
+        self.clipboard = None  # system clipboard provider, found on first :paste
         self._visual_mode = False
         self._visual_start = (0, 0)  # (y, x)
         curses.curs_set(0)  # hide cursor by default
@@ -61,10 +68,12 @@ class VimInputHandler(BaseUI):
                                 curses.A_BOLD | self.color_default
                             )
 
-            self._text_lines = value.splitlines() if value else [""]
+            self._history = UndoHistory()
+            self._buffer = TextBuffer(value, self._history)
             self._cursor_y = 0
             self._cursor_x = 0
             self._scroll_offset = 0
+            self._scroll_row = 0
             self._insert_mode = False
             self._visual_mode = False
             self._paste_buffer = []
@@ -90,17 +99,19 @@ class VimInputHandler(BaseUI):
 
                 try:
                     curses.curs_set(1)
+                    set_bracketed_paste(True)
                     result = self._vim_like_input_loop(box_height - 2, box_width - 4)
                 except KeyboardInterrupt:
                     result = None
                 finally:
+                    set_bracketed_paste(False)
                     curses.curs_set(0)
                     if self._edit_win:
                         del self._edit_win
                         self._edit_win = None
                     self.stdscr.erase()
 
-                return "\n".join(result) if result is not None else None
+                return result
 
             return None
 
@@ -113,90 +124,103 @@ class VimInputHandler(BaseUI):
     def _vim_like_input_loop(self, height, width):
         """Handles the main loop for the Vim-like input with scrolling support."""
         command_buffer = []  # buffer to store multi-key commands
+        self._wrap_width = max(1, width - 1)  # last column holds the scroll indicators
+        self._reset_screen(height)
 
         while True:
             self._adjust_scroll(height)
             self._draw_vim_editor(height, width)
-            key = self._edit_win.getch()
-
-            if key == curses.KEY_RESIZE:
-                continue
-
-            if self._insert_mode:
-                if key == curses.ascii.ESC:
-                    self._insert_mode = False
-                    self._cursor_x = max(0, self._cursor_x - 1)
-                else:
-                    self._handle_insert_mode(key)
-            else:  # normal mode
-                if command_buffer:
-                    command = command_buffer[0]
-                    if command == ord('d'):
-                        if key == ord('d'):  # dd - delete line
-                            if len(self._text_lines) > 1:
-                                self._paste_buffer = [self._text_lines.pop(self._cursor_y)]
-                                self._cursor_x = 0
-                                if self._cursor_y >= len(self._text_lines):
-                                    self._cursor_y = len(self._text_lines) - 1
-                            else:
-                                self._text_lines[0] = ""
-                        elif key == ord('w'):  # dw - delete word
-                            self._delete_word()
-                        elif key == ord('e'):  # de - delete to end of word
-                            self._delete_to_word_end()
-                        elif key == ord('$'):  # d$ - delete to end of line
-                            self._delete_to_line_end()
-                        elif key == ord('0'):  # d0 - delete to start of line
-                            self._delete_to_line_start()
-                        elif key == ord('b'):  # db - delete backward word
-                            self._delete_word_backward()
-                        command_buffer.clear()
+            for key in self.keys(self._edit_win):  # every waiting key, then one redraw
+                if not self._insert_mode:  # a normal-mode command or insert session is one undo step
+                    self._history.close((self._cursor_y, self._cursor_x))
+
+                if key == curses.KEY_RESIZE:
+                    self._reset_screen(height)
+                    continue
+                self._history.mark((self._cursor_y, self._cursor_x))
+
+                if key == curses.ascii.ESC:  # a terminal paste arrives as ESC[200~ text ESC[201~
+                    pasted = read_bracketed_paste(self._edit_win, self.pending_keys)
+                    if pasted is not None:
+                        if pasted:
+                            self._insert_text_at_cursor(pasted)
                         continue
 
-                if key == ord('d'):
-                    command_buffer = [key]
-                elif key == ord(':'):
-                    command = self._get_command()
-                    if command == "wq":
-                        return self._text_lines
-                    elif command == "q!":
-                        return None
-                    elif command == "paste":
-                        paste_result = self._handle_paste()
-                        if paste_result is not None:
-                            self._insert_text_at_cursor(paste_result)
-                else:
-                    self._handle_normal_mode(key)
+                if self._insert_mode:
+                    if key == curses.ascii.ESC:
+                        self._insert_mode = False
+                        self._cursor_x = max(0, self._cursor_x - 1)
+                    else:
+                        self._handle_insert_mode(key)
+                else:  # normal mode
+                    if command_buffer:
+                        command = command_buffer[0]
+                        if command == ord('d'):
+                            if key == ord('d'):  # dd - delete line
+                                if len(self._buffer) > 1:
+                                    self._paste_buffer = self._buffer.delete_lines(self._cursor_y)
+                                    self._cursor_x = 0
+                                    if self._cursor_y >= len(self._buffer):
+                                        self._cursor_y = len(self._buffer) - 1
+                                else:
+                                    self._buffer.set_line(0, "")
+                            elif key == ord('w'):  # dw - delete word
+                                self._delete_word()
+                            elif key == ord('e'):  # de - delete to end of word
+                                self._delete_to_word_end()
+                            elif key == ord('$'):  # d$ - delete to end of line
+                                self._delete_to_line_end()
+                            elif key == ord('0'):  # d0 - delete to start of line
+                                self._delete_to_line_start()
+                            elif key == ord('b'):  # db - delete backward word
+                                self._delete_word_backward()
+                            command_buffer.clear()
+                            continue
+
+                    if key == ord('d'):
+                        command_buffer = [key]
+                    elif key == ord(':'):
+                        command = self._get_command()
+                        if command == "wq":
+                            return self._buffer.text()
+                        elif command == "q!":
+                            return None
+                        elif command == "paste":
+                            paste_result = self._handle_paste()
+                            if paste_result:
+                                self._insert_text_at_cursor(paste_result)
+                    else:
+                        self._handle_normal_mode(key)
 
-            self._adjust_cursor_within_bounds(height, width)
+                self._adjust_cursor_within_bounds(height, width)
 
     def _handle_normal_mode(self, key):
         """Handle keys in normal mode."""
         if key == ord('h'):
             self._cursor_x = max(0, self._cursor_x - 1)
         elif key == ord('j'):
-            if self._cursor_y < len(self._text_lines) - 1:
+            if self._cursor_y < len(self._buffer) - 1:
                 self._cursor_y += 1
         elif key == ord('k'):
             if self._cursor_y > 0:
                 self._cursor_y -= 1
         elif key == ord('l'):
-            self._cursor_x = min(len(self._text_lines[self._cursor_y]), self._cursor_x + 1)
+            self._cursor_x = min(self._buffer.line_length(self._cursor_y), self._cursor_x + 1)
         elif key == ord('i'):
             self._insert_mode = True
         elif key == ord('a'):
-            self._cursor_x = min(len(self._text_lines[self._cursor_y]), self._cursor_x + 1)
+            self._cursor_x = min(self._buffer.line_length(self._cursor_y), self._cursor_x + 1)
             self._insert_mode = True
         elif key == ord('A'):
-            self._cursor_x = len(self._text_lines[self._cursor_y])
+            self._cursor_x = self._buffer.line_length(self._cursor_y)
             self._insert_mode = True
         elif key == ord('o'):
-            self._text_lines.insert(self._cursor_y + 1, "")
+            self._buffer.insert_lines(self._cursor_y + 1, [""])
             self._cursor_y += 1
             self._cursor_x = 0
             self._insert_mode = True
         elif key == ord('O'):
-            self._text_lines.insert(self._cursor_y, "")
+            self._buffer.insert_lines(self._cursor_y, [""])
             self._cursor_x = 0
             self._insert_mode = True
         elif key == ord('v'):
@@ -211,106 +235,145 @@ class VimInputHandler(BaseUI):
         elif key == ord('P'):
             self._paste_text(after=False)
         elif key == ord('G'):
-            self._cursor_y = len(self._text_lines) - 1
+            self._cursor_y = len(self._buffer) - 1
         elif key == ord('g'):
-            next_key = self._edit_win.getch()
+            next_key = self.getch(self._edit_win)
             if next_key == ord('g'):
                 self._cursor_y = 0
         elif key == ord('x'): # Delete character under cursor
             self._delete_char_under_cursor()
+        elif key == ord('u'):
+            cursor = self._history.undo(self._buffer)
+            if cursor is not None:
+                self._cursor_y, self._cursor_x = cursor
+        elif key == 18:  # Ctrl+R
+            cursor = self._history.redo(self._buffer)
+            if cursor is not None:
+                self._cursor_y, self._cursor_x = cursor
         return None
-    def _draw_vim_editor(self, height, width):
+    def _reset_screen(self, height):
+        """Forgets what is on screen so the next draw repaints every row."""
         self._edit_win.erase()
-        safe_width = width - 1
-
-        visible_range = range(self._scroll_offset, min(len(self._text_lines), self._scroll_offset + height - 1))
+        self._screen = [None] * (height - 1)
+        self._mode_shown = None
+
+    def _line_rows(self, y):
+        """Number of screen rows line y wraps onto, counting the row the cursor takes past a full last row."""
+        return self._buffer.line_length(y) // self._wrap_width + 1
+
+    def _visible_rows(self, text_height):
+        """Returns (line, start column, text) for each screen row from the scroll position, and whether more follow.
+
+        Only the rows on screen are sliced out of the buffer; the document
+        itself is never changed by wrapping.
+        """
+        rows = []
+        y, row = self._scroll_offset, self._scroll_row
+        width = self._wrap_width
+        while y < len(self._buffer):
+            line_rows = self._line_rows(y)
+            while row < line_rows:
+                if len(rows) == text_height:
+                    return rows, True
+                start = row * width
+                rows.append((y, start, self._buffer.line_slice(y, start, start + width)))
+                row += 1
+            y += 1
+            row = 0
+        return rows, False
+
+    def _selected_span(self, y, start, length):
+        """Returns the (from, to) columns of a screen row that are in the visual selection, or None."""
+        (start_y, start_x), (end_y, end_x) = sorted([self._visual_start, (self._cursor_y, self._cursor_x)])
+        if not start_y <= y <= end_y:
+            return None
+        low = start_x if y == start_y else 0
+        high = end_x + 1 if y == end_y else start + length
+        low, high = max(low, start) - start, min(high, start + length) - start
+        return (low, high) if low < high else None
 
-        for i, line_idx in enumerate(visible_range):
-            line = self._text_lines[line_idx]
-            if len(line) > safe_width:
-                display_line = line[:safe_width]
-                self._edit_win.addstr(i, safe_width - 1, '→', curses.A_DIM | self.color_default)
+    def _draw_vim_editor(self, height, width):
+        """Draws the rows that changed since the last draw, then places the cursor.
+
+        Each text row is compared with what it showed before (text, selected
+        span, scroll indicator), so a keystroke usually rewrites one row.
+        """
+        text_height = height - 1
+        rows, more_below = self._visible_rows(text_height)
+        scrolled = self._scroll_offset > 0 or self._scroll_row > 0
+        cursor = None
+
+        for i in range(text_height):
+            if i < len(rows):
+                y, start, text = rows[i]
+                span = self._selected_span(y, start, len(text)) if self._visual_mode else None
+                if y == self._cursor_y and start // self._wrap_width == self._cursor_x // self._wrap_width:
+                    cursor = (i, self._cursor_x - start)
             else:
-                display_line = line
-
-            if self._visual_mode:
-                self._highlight_visual_selection(line_idx, display_line, safe_width, i)
+                text, span = "", None
+            if i == 0 and scrolled:
+                indicator = "↑"
+            elif i == text_height - 1 and more_below:
+                indicator = "↓"
             else:
-                self._edit_win.addstr(i, 0, display_line, self.color_default)
-                if len(display_line) < safe_width - 1:
-                    self._edit_win.addstr(i, len(display_line), ' ' * (safe_width - len(display_line) - 1))
-
-        if self._scroll_offset > 0:
-            self._edit_win.addstr(0, width - 1, "↑", curses.A_DIM | self.color_default)
-        if self._scroll_offset + height - 1 < len(self._text_lines):
-            self._edit_win.addstr(height - 2, width - 1, "↓", curses.A_DIM | self.color_default)
+                indicator = " "
+            state = (text, span, indicator)
+            if self._screen[i] != state:
+                self._screen[i] = state
+                self._draw_row(i, text, span, indicator)
 
         mode_indicator = "INSERT" if self._insert_mode else "VISUAL" if self._visual_mode else "NORMAL"
-        mode_attr = curses.A_BOLD | self.color_highlight if self._insert_mode or self._visual_mode else curses.A_DIM | self.color_default
-        mode_x = width - len(mode_indicator) - 1
-        if mode_x >= 0:
-            self._edit_win.addstr(height - 1, mode_x, mode_indicator, mode_attr)
-
-        cursor_y = self._cursor_y - self._scroll_offset
-        if 0 <= cursor_y < height - 1:
-            current_line = self._text_lines[self._cursor_y]
-            if len(current_line) >= safe_width and self._cursor_x >= safe_width:
-                self._text_lines.insert(self._cursor_y + 1, current_line[safe_width:])
-                self._text_lines[self._cursor_y] = current_line[:safe_width]
-                self._cursor_y += 1
-                self._cursor_x = 0
-            else:
-                self._edit_win.move(cursor_y, min(self._cursor_x, len(current_line)))
+        if self._mode_shown != mode_indicator:
+            self._mode_shown = mode_indicator
+            mode_attr = curses.A_BOLD | self.color_highlight if self._insert_mode or self._visual_mode else curses.A_DIM | self.color_default
+            self._edit_win.move(height - 1, 0)
+            self._edit_win.clrtoeol()
+            mode_x = width - len(mode_indicator) - 1
+            if mode_x >= 0:
+                self._edit_win.addstr(height - 1, mode_x, mode_indicator, mode_attr)
+
+        if cursor is not None:
+            self._edit_win.move(*cursor)
 
         self._edit_win.refresh()
 
-    def _adjust_cursor_within_bounds(self, height, width):
-        """Keeps the cursor within text boundaries and adjusts scroll if needed."""
-        self._cursor_y = max(0, min(len(self._text_lines) - 1, self._cursor_y))
-        current_line_len = len(self._text_lines[self._cursor_y])
-
-        safe_width = width - 1  # leave space for scroll indicator
-        self._cursor_x = max(0, min(current_line_len, safe_width - 1))
-
-        self._adjust_scroll(height)
+    def _draw_row(self, i, text, span, indicator):
+        padded = text.ljust(self._wrap_width)
+        if span is None:
+            self._edit_win.addstr(i, 0, padded, self.color_default)
+        else:
+            low, high = span
+            for col, part, attr in (
+                (0, padded[:low], self.color_default),
+                (low, padded[low:high], self.color_highlight),
+                (high, padded[high:], self.color_default),
+            ):
+                if part:
+                    self._edit_win.addstr(i, col, part, attr)
+        self._edit_win.addstr(i, self._wrap_width, indicator, curses.A_DIM | self.color_default)
 
     def _handle_insert_mode(self, key):
         """Handle keys in insert mode with bounds checking."""
         if key == curses.KEY_ENTER or key == 10:  # Enter key
-            current_line = self._text_lines[self._cursor_y]
-            self._text_lines[self._cursor_y] = current_line[:self._cursor_x]
-            self._text_lines.insert(self._cursor_y + 1, current_line[self._cursor_x:])
+            self._buffer.split_line(self._cursor_y, self._cursor_x)
             self._cursor_y += 1
             self._cursor_x = 0
         elif key == curses.KEY_BACKSPACE or key == 127 or key == 8:  #backspace (added 8 for Windows compatibility)
             if self._cursor_x > 0:
-                current_line = self._text_lines[self._cursor_y]
-                self._text_lines[self._cursor_y] = (
-                    current_line[:self._cursor_x - 1] + current_line[self._cursor_x:]
-                )
+                self._buffer.delete(self._cursor_y, self._cursor_x - 1, 1)
                 self._cursor_x -= 1
             elif self._cursor_y > 0:  # at start of line, merge with previous line
-                prev_line_len = len(self._text_lines[self._cursor_y - 1])
-                self._text_lines[self._cursor_y - 1] += self._text_lines[self._cursor_y]
-                del self._text_lines[self._cursor_y]
+                self._cursor_x = self._buffer.join_lines(self._cursor_y - 1)
                 self._cursor_y -= 1
-                self._cursor_x = prev_line_len
         elif 32 <= key <= 126:  # printable characters
-            current_line = self._text_lines[self._cursor_y]
-            char = chr(key)
-            self._text_lines[self._cursor_y] = (
-                current_line[:self._cursor_x] + char + current_line[self._cursor_x:]
-            )
-            self._cursor_x += 1
+            self._cursor_y, self._cursor_x = self._buffer.insert(self._cursor_y, self._cursor_x, chr(key))
 
     def _delete_word(self):
         """Delete from cursor to start of next word."""
-        line = self._text_lines[self._cursor_y]
+        line = self._buffer.line(self._cursor_y)
         if self._cursor_x >= len(line):
-            if self._cursor_y < len(self._text_lines) - 1:
-                self._paste_buffer = [line[self._cursor_x:] + self._text_lines[self._cursor_y + 1][:1]]
-                self._text_lines[self._cursor_y] = line[:self._cursor_x]
-                self._text_lines[self._cursor_y + 1] = self._text_lines[self._cursor_y + 1][1:]
+            if self._cursor_y < len(self._buffer) - 1:
+                self._paste_buffer = [self._buffer.delete(self._cursor_y + 1, 0, 1)]
             return
 
         pos = self._cursor_x
@@ -319,12 +382,11 @@ class VimInputHandler(BaseUI):
         while pos < len(line) and not line[pos].isspace():
             pos += 1
 
-        self._paste_buffer = [line[self._cursor_x:pos]]
-        self._text_lines[self._cursor_y] = line[:self._cursor_x] + line[pos:]
+        self._paste_buffer = [self._buffer.delete(self._cursor_y, self._cursor_x, pos - self._cursor_x)]
 
     def _delete_to_word_end(self):
         """Delete from cursor to end of current word."""
-        line = self._text_lines[self._cursor_y]
+        line = self._buffer.line(self._cursor_y)
         if self._cursor_x >= len(line):
             return
 
@@ -338,19 +400,17 @@ class VimInputHandler(BaseUI):
             while pos < len(line) and not line[pos].isspace():
                 pos += 1
 
-        self._paste_buffer = [line[self._cursor_x:pos]]
-        self._text_lines[self._cursor_y] = line[:self._cursor_x] + line[pos:]
+        self._paste_buffer = [self._buffer.delete(self._cursor_y, self._cursor_x, pos - self._cursor_x)]
 
 
     def _delete_word_backward(self):
         """Delete word before cursor."""
-        line = self._text_lines[self._cursor_y]
+        line = self._buffer.line(self._cursor_y)
         if self._cursor_x == 0:
             if self._cursor_y > 0:
-                prev_line = self._text_lines[self._cursor_y - 1]
-                self._paste_buffer = [prev_line[-1:] + line[:1]]
-                self._text_lines[self._cursor_y - 1] = prev_line[:-1]
-                self._text_lines[self._cursor_y] = line[1:]
+                prev_length = self._buffer.line_length(self._cursor_y - 1)
+                removed = self._buffer.delete(self._cursor_y - 1, max(0, prev_length - 1), 1)
+                self._paste_buffer = [removed + self._buffer.delete(self._cursor_y, 0, 1)]
             return
 
         pos = self._cursor_x - 1
@@ -359,47 +419,21 @@ class VimInputHandler(BaseUI):
         while pos > 0 and not line[pos-1].isspace():
             pos -= 1
 
-        self._paste_buffer = [line[pos:self._cursor_x]]
-        self._text_lines[self._cursor_y] = line[:pos] + line[self._cursor_x:]
+        self._paste_buffer = [self._buffer.delete(self._cursor_y, pos, self._cursor_x - pos)]
         self._cursor_x = pos
 
     def _delete_to_line_end(self):
         """Delete from cursor to end of line."""
-        line = self._text_lines[self._cursor_y]
-        if self._cursor_x < len(line):
-            self._paste_buffer = [line[self._cursor_x:]]
-            self._text_lines[self._cursor_y] = line[:self._cursor_x]
+        line_length = self._buffer.line_length(self._cursor_y)
+        if self._cursor_x < line_length:
+            self._paste_buffer = [self._buffer.delete(self._cursor_y, self._cursor_x, line_length - self._cursor_x)]
 
     def _delete_to_line_start(self):
         """Delete from cursor to start of line."""
-        line = self._text_lines[self._cursor_y]
         if self._cursor_x > 0:
-            self._paste_buffer = [line[:self._cursor_x]]
-            self._text_lines[self._cursor_y] = line[self._cursor_x:]
+            self._paste_buffer = [self._buffer.delete(self._cursor_y, 0, self._cursor_x)]
             self._cursor_x = 0
 
-    def _highlight_visual_selection(self, line_idx, line, width, display_idx):
-        """Highlights the visually selected text with scroll offset support."""
-        start_y, start_x = min(self._visual_start, (self._cursor_y, self._cursor_x))
-        end_y, end_x = max(self._visual_start, (self._cursor_y, self._cursor_x))
-
-        if start_y <= line_idx <= end_y:
-            row_text = line[:width]
-            if line_idx == start_y == end_y:
-                self._edit_win.addstr(display_idx, 0, row_text[:start_x], self.color_default)
-                self._edit_win.addstr(display_idx, start_x, row_text[start_x:end_x + 1], self.color_highlight)
-                self._edit_win.addstr(display_idx, end_x + 1, row_text[end_x + 1:], self.color_default)
-            elif line_idx == start_y:
-                self._edit_win.addstr(display_idx, 0, row_text[:start_x], self.color_default)
-                self._edit_win.addstr(display_idx, start_x, row_text[start_x:], self.color_highlight)
-            elif line_idx == end_y:
-                self._edit_win.addstr(display_idx, 0, row_text[:end_x + 1], self.color_highlight)
-                self._edit_win.addstr(display_idx, end_x + 1, row_text[end_x + 1:], self.color_default)
-            else:
-                self._edit_win.addstr(display_idx, 0, row_text, self.color_highlight)
-        else:
-            self._edit_win.addstr(display_idx, 0, line[:width], self.color_default)
-
     def _copy_visual_selection(self):
         """Copies the currently visually selected text to the paste buffer."""
         if not self._visual_mode:
@@ -412,7 +446,7 @@ class VimInputHandler(BaseUI):
 
         self._paste_buffer = []
         for y in range(start_y, end_y + 1):
-            line = self._text_lines[y]
+            line = self._buffer.line(y)
             if y == start_y and y == end_y:
                 self._paste_buffer.append(line[start_x:end_x + 1])
             elif y == start_y:
@@ -427,175 +461,149 @@ class VimInputHandler(BaseUI):
         if not self._paste_buffer:
             return
 
-        if after:
-            target_y = self._cursor_y
-            target_x = self._cursor_x + 1 if self._cursor_x < len(self._text_lines[self._cursor_y]) else self._cursor_x
-        else:
-            target_y = self._cursor_y
-            target_x = self._cursor_x
-
-        if len(self._paste_buffer) > 1:
-            remainder = self._text_lines[target_y][target_x:]
-            self._text_lines[target_y] = self._text_lines[target_y][:target_x] + self._paste_buffer[0]
+        target_x = self._cursor_x
+        if after and self._cursor_x < self._buffer.line_length(self._cursor_y):
+            target_x += 1
+        self._cursor_y, self._cursor_x = self._buffer.insert(
+            self._cursor_y, target_x, "\n".join(self._paste_buffer)
+        )
 
-            self._text_lines[target_y + 1:target_y + 1] = self._paste_buffer[1:]
-            last_line_idx = target_y + len(self._paste_buffer)
-            self._text_lines[last_line_idx - 1] += remainder
-
-            self._cursor_y = last_line_idx - 1
-            self._cursor_x = len(self._text_lines[self._cursor_y]) - len(remainder)
-        else:
-            line = self._paste_buffer[0]
-            self._text_lines[target_y] = (
-                self._text_lines[target_y][:target_x] +
-                line +
-                self._text_lines[target_y][target_x:]
-            )
-            self._cursor_x = target_x + len(line)
+    def _insert_text_at_cursor(self, text):
+        """Inserts text (e.g. from the clipboard) at the cursor as a single edit."""
+        self._cursor_y, self._cursor_x = self._buffer.insert(self._cursor_y, self._cursor_x, text)
 
     def _handle_paste(self):
-        """Attempts to get clipboard content."""
-        curses.endwin()  # End curses temporarily
-        try:
-            import subprocess
-            paste_content = subprocess.check_output(['xclip', '-selection', 'clipboard', '-o'], text=True)
-            return paste_content.splitlines()
-        except (FileNotFoundError, subprocess.CalledProcessError):
+        """Returns the system clipboard's text without its final newline, or None if it cannot be read."""
+        if self.clipboard is None:
+            self.clipboard = detect_clipboard(self._edit_win, self.pending_keys)
+            if self.clipboard is None:
+                return None
+        text = self.clipboard.paste()
+        if text is None:
             return None
-        finally:
-            self.stdscr = curses.initscr()  # Re-initialize curses
-            curses.noecho()
-            curses.cbreak()
-            self.stdscr.keypad(True)
-            self._edit_win.keypad(True)
+        text = clean_paste(text)
+        return text[:-1] if text.endswith("\n") else text
 
     def _get_command(self):
-        """Get command input from the user."""
-        rows, _ = self._edit_win.getmaxyx()
-        command_line = ":"
-        self._edit_win.addstr(rows - 1, 0, command_line, curses.A_REVERSE)
+        """Get command input from the user.
+
+        Keys are read one at a time with getch, so keys already queued in
+        pending_keys (e.g. typed right after a paste) are used first. Enter
+        runs the command, Backspace deletes a character and Esc cancels.
+        """
+        rows, cols = self._edit_win.getmaxyx()
+        self._edit_win.addstr(rows - 1, 0, ":", curses.A_REVERSE)
+        self._edit_win.clrtoeol()
         curses.curs_set(1)
-        curses.echo()
-        self._edit_win.refresh()
-        command = self._edit_win.getstr(rows - 1, 1).decode('utf-8')
-        curses.noecho()
-        curses.curs_set(0)
-        return command.strip()
+        typed = bytearray()  # raw bytes, so multi-byte characters are decoded whole
+        try:
+            while True:
+                text = typed.decode('utf-8', errors='ignore')[-(cols - 2):] if cols > 2 else ""
+                self._edit_win.addstr(rows - 1, 1, text)
+                self._edit_win.clrtoeol()
+                self._edit_win.refresh()
+                key = self.getch(self._edit_win)
+                if key in (curses.KEY_ENTER, 10, 13):
+                    break
+                if key == curses.ascii.ESC:
+                    typed.clear()
+                    break
+                if key in (curses.KEY_BACKSPACE, 127, 8):
+                    text = typed.decode('utf-8', errors='replace')
+                    typed = bytearray(text[:-1].encode('utf-8'))
+                elif 32 <= key < 256:
+                    typed.append(key)
+        finally:
+            curses.curs_set(0)
+        self._mode_shown = None  # the command line covered the mode indicator
+        return typed.decode('utf-8', errors='replace').strip()
 
     def _adjust_cursor_within_bounds(self, height, width):
         """Keeps the cursor within the text boundaries."""
-        self._cursor_y = max(0, min(len(self._text_lines) - 1, self._cursor_y))
-        self._cursor_x = max(0, min(len(self._text_lines[self._cursor_y]), self._cursor_x))
+        self._cursor_y = max(0, min(len(self._buffer) - 1, self._cursor_y))
+        self._cursor_x = max(0, min(self._buffer.line_length(self._cursor_y), self._cursor_x))
         self._adjust_scroll(height)
 
     def _adjust_scroll(self, height):
-        """Adjusts scroll position to keep cursor in view."""
-        if self._cursor_y < self._scroll_offset:
-            self._scroll_offset = self._cursor_y
-        elif self._cursor_y >= self._scroll_offset + height - 1:
-            self._scroll_offset = self._cursor_y - height + 2
-
-        max_scroll = max(0, len(self._text_lines) - height + 1)
-        self._scroll_offset = max(0, min(self._scroll_offset, max_scroll))
+        """Scrolls by screen rows so the row holding the cursor is in view.
+
+        Only the rows between the old scroll position and the cursor are
+        counted, at most a screenful, so jumps like G stay cheap.
+        """
+        text_height = height - 1
+        top_y = min(self._scroll_offset, len(self._buffer) - 1)
+        top_row = min(self._scroll_row, self._line_rows(top_y) - 1)  # lines may have been deleted
+        cursor_row = self._cursor_x // self._wrap_width
+        if (self._cursor_y, cursor_row) < (top_y, top_row):
+            top_y, top_row = self._cursor_y, cursor_row
+        else:
+            distance = -top_row
+            y = top_y
+            while y < self._cursor_y and distance < text_height:
+                distance += self._line_rows(y)
+                y += 1
+            if y < self._cursor_y or distance + cursor_row >= text_height:
+                # put the cursor on the last text row
+                top_y, top_row = self._cursor_y, cursor_row
+                remaining = text_height - 1
+                while remaining > 0 and (top_y > 0 or top_row > 0):
+                    if top_row >= remaining:
+                        top_row -= remaining
+                        remaining = 0
+                    else:
+                        remaining -= top_row + 1
+                        top_y -= 1
+                        top_row = self._line_rows(top_y) - 1
+        self._scroll_offset, self._scroll_row = top_y, top_row
 
     def show_menu(self, title, options):
-        """Display a menu and handle user selection."""
-        curses.curs_set(0)  # hide cursor for menu
-        self.stdscr.erase()
-        rows, cols = self.stdscr.getmaxyx()
-        max_visible_options = rows - 6
-        menu_width = min(cols - 4, max(len(text) for _, text in options) + 12)
+        """Display a menu and handle user selection.
 
-        if self._top_index > 0:
-            self._selected_index = self._top_index = 0
-
-        # create a mapping of option keys to their indices
-        key_map = {key.lower(): i for i, (key, _) in enumerate(options)}
+        `options` is a list of (key, text) pairs or a lazy sequence such as
+        menu.NumberedOptions; only the rows on screen are formatted. Numbers
+        with several digits can be typed; "/" filters the options."""
+        curses.curs_set(0)  # hide cursor for menu
+        menu = Menu(options)
 
         while True:
-            self.stdscr.erase()
-            menu_height = min(len(options) + 4, max_visible_options + 4)
-            menu_row = max(0, (rows - menu_height) // 2)
-            menu_col = max(0, (cols - menu_width) // 2)
-
-            self._draw_box(menu_row, menu_col, menu_height, menu_width, title)
-
-            for i, (key, text) in enumerate(options):
-                if self._top_index <= i < self._top_index + max_visible_options:
-                    item_text = f" {key}. {text} "
-                    item_col = menu_col + (menu_width - len(item_text)) // 2
-
-                    if i == self._selected_index:
-                        self.stdscr.attron(self.color_highlight | curses.A_BOLD)
-                        self.stdscr.addstr(menu_row + (i - self._top_index) + 2, item_col, item_text)
-                        self.stdscr.attroff(self.color_highlight | curses.A_BOLD)
-                    else:
-                        self.stdscr.addstr(menu_row + (i - self._top_index) + 2, item_col, item_text)
-
-            nav_help_text = "Navigate: j/k or ↑/↓, Select: Enter/Number"
-            self.stdscr.addstr(
-                rows - 2,
-                max(0, (cols - len(nav_help_text)) // 2),
-                nav_help_text,
-                curses.A_ITALIC | self.color_default
-            )
-
-            self.stdscr.refresh()
+            menu.draw(self, title, "Navigate: j/k or ↑/↓, Select: Enter/Number, Filter: /")
 
             try:
-                key = self.stdscr.getch()
-            except KeyboardInterrupt:
-                return None
+                for key in self.keys():  # every waiting key, then one redraw
+                    if key == 3:  # Ctrl+C
+                        return None
 
-            if key == 3:  # Ctrl+C
-                return None
+                    # option keys, multi-digit numbers and the "/" filter
+                    action = menu.handle_key(key)
+                    if action == Menu.SELECT:
+                        return menu.key()
+                    if action == Menu.HANDLED:
+                        continue
 
-            pressed_char = chr(key).lower() if 32 <= key <= 126 else None
-            if pressed_char in key_map:
-                self._selected_index = self._top_index = 0
-                return options[key_map[pressed_char]][0]
-
-            if key in [curses.KEY_DOWN, ord('j')]:  # down arrow or j
-                self._selected_index = min(self._selected_index + 1, len(options) - 1)
-                if self._selected_index >= self._top_index + max_visible_options:
-                    self._top_index = min(
-                        self._selected_index - max_visible_options + 1,
-                        len(options) - max_visible_options
-                    )
-            elif key in [curses.KEY_UP, ord('k')]:  # up arrow or k
-                self._selected_index = max(self._selected_index - 1, 0)
-                if self._selected_index < self._top_index:
-                    self._top_index = max(0, self._selected_index)
-            elif key in [curses.KEY_ENTER, 10, ord(' '), ord('l')]:  # enter, space, or l
-                selected_option = options[self._selected_index][0]
-                self._selected_index = self._top_index = 0
-                return selected_option
-            elif key == ord('h'):  # h to go back
+                    if key in [curses.KEY_DOWN, ord('j')]:  # down arrow or j
+                        menu.move(1)
+                    elif key in [curses.KEY_UP, ord('k')]:  # up arrow or k
+                        menu.move(-1)
+                    elif key in [curses.KEY_ENTER, 10, ord(' '), ord('l')]:  # enter, space, or l
+                        return menu.key()
+                    elif key == ord('h'):  # h to go back
+                        return None
+                    elif key == ord('G'):  # G to go to bottom
+                        menu.move_to(len(menu.rows) - 1)
+                    elif key == ord('g'):  # gg to go to top
+                        next_key = self.getch()
+                        if next_key == ord('g'):
+                            menu.move_to(0)
+            except KeyboardInterrupt:
                 return None
-            elif key == ord('G'):  # G to go to bottom
-                self._selected_index = len(options) - 1
-                if len(options) > max_visible_options:
-                    self._top_index = len(options) - max_visible_options
-            elif key == ord('g'):  # gg to go to top
-                next_key = self.stdscr.getch()
-                if next_key == ord('g'):
-                    self._selected_index = 0
-                    self._top_index = 0
-            elif key == 3:  # CTRL+C
-                raise KeyboardInterrupt
 
     def _delete_char_under_cursor(self):
         """Deletes the character at the current cursor position in normal mode."""
-        if not self._text_lines:
-            return
-        line = self._text_lines[self._cursor_y]
-        if 0 <= self._cursor_x < len(line):
-            self._text_lines[self._cursor_y] = line[:self._cursor_x] + line[self._cursor_x+1:]
-            if not self._text_lines[self._cursor_y]: # if line becomes empty after deleting the only char
-                if len(self._text_lines) > 1:
-                    del self._text_lines[self._cursor_y]
-                    if self._cursor_y >= len(self._text_lines):
-                        self._cursor_y = len(self._text_lines) - 1
+        if 0 <= self._cursor_x < self._buffer.line_length(self._cursor_y):
+            self._buffer.delete(self._cursor_y, self._cursor_x, 1)
+            if not self._buffer.line_length(self._cursor_y): # if line becomes empty after deleting the only char
+                if len(self._buffer) > 1:
+                    self._buffer.delete_lines(self._cursor_y)
+                    if self._cursor_y >= len(self._buffer):
+                        self._cursor_y = len(self._buffer) - 1
                     self._cursor_x = 0
-                else:
-                    self._text_lines[0] = "" # keep at least one empty line
\ No newline at end of file